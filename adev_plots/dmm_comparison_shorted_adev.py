@@ -1,6 +1,7 @@
-import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 phi = (5**0.5 - 1) / 2  # golden ratio
 plot = {
@@ -55,7 +56,7 @@ plot = {
                             1: "3458a",
                         },
                         "scaling": {
-                            "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                            "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                         },
                     },
                 },
@@ -69,7 +70,7 @@ plot = {
                             1: "k2002",
                         },
                         "scaling": {
-                            "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                            "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                         },
                     },
                 },
@@ -83,7 +84,7 @@ plot = {
                             1: "34470a",
                         },
                         "scaling": {
-                            "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                            "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                         },
                     },
                 },
@@ -97,7 +98,7 @@ plot = {
                             1: "dmm6500",
                         },
                         "scaling": {
-                            "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                            "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                         },
                     },
                 },
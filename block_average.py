@@ -0,0 +1,96 @@
+"""
+Block averaging of the logs to emulate longer integration times of a DMM, e.g. NPLC 10 or 100 from a log recorded at
+NPLC 1. The stage is enabled by the "block_average" option of a file:
+    "block_average": {"samples": 10}  # Average blocks of 10 samples
+    "block_average": {"interval": "2s"}  # Average the samples within time bins of 2 s, aligned to the epoch
+  "partial": Keep the trailing block, even if it is shorter than the others. Defaults to True.
+All numeric columns are averaged, NaNs are ignored. The "date" column holds the start of each block: the date of its
+first sample or the start of the time bin.
+The blocks are reduced by np.add.reduceat() on the raw column arrays, which takes milliseconds even for 10^7 rows,
+instead of a pandas groupby.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _block_means(values, starts, counts):
+    sums = np.add.reduceat(values, starts)
+    if not np.isnan(sums).any():
+        return sums / counts
+    # Only columns with NaNs need the slower path, that counts the valid samples of each block
+    is_valid = ~np.isnan(values)
+    valid_counts = np.add.reduceat(is_valid, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.add.reduceat(np.where(is_valid, values, 0), starts) / valid_counts
+
+
+def _time_bins(dates, interval):
+    """
+    Returns the index of the first sample of each time bin, the start of the bins and whether the last bin is complete.
+    Empty bins are skipped.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if not dates.is_monotonic_increasing:
+        raise ValueError("Block averaging by time requires the dates to be sorted.")
+    # Work on the integer timestamps in the resolution of the index, converting them is slower than the averaging
+    timestamps = dates.asi8
+    interval = pd.Timedelta(interval) if isinstance(interval, str) else pd.Timedelta(seconds=interval)
+    width = interval // pd.Timedelta(1, unit=dates.unit)
+    first_bin, last_bin = timestamps[0] // width, timestamps[-1] // width
+    starts = np.searchsorted(timestamps, np.arange(first_bin, last_bin + 1) * width)
+    is_occupied = np.diff(np.append(starts, len(timestamps))) > 0
+    bin_starts = np.arange(first_bin, last_bin + 1)[is_occupied] * width
+    bin_starts = pd.DatetimeIndex(bin_starts.astype(f"datetime64[{dates.unit}]"))
+    if dates.tz is not None:
+        bin_starts = bin_starts.tz_localize("UTC").tz_convert(dates.tz)
+    # The last bin is complete, if the next sample would fall into the next bin
+    sample_interval = (timestamps[-1] - timestamps[0]) // max(len(timestamps) - 1, 1)
+    is_complete = (timestamps[-1] + sample_interval) // width > last_bin
+    return starts[is_occupied], bin_starts, is_complete
+
+
+def block_average(data, samples=None, interval=None, partial=True):
+    """
+    Returns the averages of the numeric columns over blocks of `samples` rows or over time bins of length `interval`,
+    which is a pandas time span like "10s" or a number of seconds.
+    """
+    if (samples is None) == (interval is None):
+        raise ValueError("Block averaging requires either the number of samples or the interval.")
+    if len(data) == 0:
+        return data
+
+    if samples is not None:
+        starts = np.arange(0, len(data), samples)
+        dates = data["date"].array[starts] if "date" in data else None
+        is_complete = len(data) % samples == 0
+    else:
+        starts, dates, is_complete = _time_bins(data["date"], interval)
+    end = len(data)
+    if not (partial or is_complete):
+        # Drop the incomplete trailing block
+        end, starts = starts[-1], starts[:-1]
+        dates = dates[:-1] if dates is not None else None
+    counts = np.diff(np.append(starts, end))
+
+    averages = {} if dates is None else {"date": dates}
+    for column in data:
+        if column != "date" and pd.api.types.is_numeric_dtype(data[column]):
+            averages[column] = _block_means(data[column].to_numpy(dtype=np.float64)[:end], starts, counts)
+    return pd.DataFrame(averages)
+
+
+def average_blocks(data, metadata, settings):
+    """
+    Returns the block averages of `data` according to the "block_average" `settings` and the parser metadata with the
+    new sample interval.
+    """
+    samples, interval = settings.get("samples"), settings.get("interval")
+    averages = block_average(data, samples, interval, settings.get("partial", True))
+    print(f"  Averaged {len(data)} rows in blocks of {samples or interval} to {len(averages)} rows.")
+    if isinstance(metadata, dict) and metadata.get("sample_interval"):
+        if samples is not None:
+            sample_interval = metadata["sample_interval"] * samples
+        else:
+            sample_interval = pd.Timedelta(interval).total_seconds() if isinstance(interval, str) else interval
+        metadata = {**metadata, "sample_interval": sample_interval}
+    return averages, metadata
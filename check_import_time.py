@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Checks the cold start time of file_parser and of the plot drivers. Each command is run in a fresh interpreter, like the
+Makefile does for every figure, and fails if it takes longer than the budget. The slowest imports are listed to find
+the culprit.
+The budget in seconds is set by the environment variable IMPORT_TIME_BUDGET.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+__version__ = "0.9.0"
+
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", 1.5))  # in s
+DRIVERS = [
+    "plot_allan_variance.py",
+    "plot_fft.py",
+    "plot_generic.py",
+    "plot_ltspice_monte-carlo.py",
+    "plot_popcorn_noise.py",
+    "plot_xy.py",
+    "fit_kraken.py",
+]
+COMMANDS = [["-c", "import file_parser"]] + [[driver, "--version"] for driver in DRIVERS]
+
+
+def cold_start_time(command, repeat):
+    # The fastest run is the least disturbed by other processes
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *command], check=True, capture_output=True)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def slowest_imports(command, count=10):
+    result = subprocess.run([sys.executable, "-X", "importtime", *command], capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def init_argparse() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Check the import time of file_parser and the plot drivers.")
+    parser.add_argument("-v", "--version", action="version", version=f"{parser.prog} version {__version__}")
+    parser.add_argument("--budget", type=float, default=IMPORT_TIME_BUDGET, help="Maximum cold start time in seconds.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per command.")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = init_argparse()
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.realpath(__file__)))
+    failed = False
+    for command in COMMANDS:
+        duration = cold_start_time(command, args.repeat)
+        over_budget = duration > args.budget
+        print(f"{'FAIL' if over_budget else 'OK  '} {duration:.2f} s  python {' '.join(command)}")
+        if over_budget:
+            failed = True
+            for cumulative_time, module in slowest_imports(command):
+                print(f"    {cumulative_time / 1e6:.2f} s  {module}")
+    if failed:
+        print(f"  Cold start exceeds the budget of {args.budget:.2f} s.")
+        sys.exit(1)
@@ -0,0 +1,153 @@
+"""
+A sidecar index for large, uncompressed csv log files. Every SAMPLE_INTERVAL rows, the timestamp, byte offset and line
+number of a row is stored in '<filename>.index.npz'. The index allows to find a time window in a log without searching
+the whole file. If rows are appended to the log, only the new rows are added to the index.
+The index can be disabled by setting the environment variable FILE_PARSER_INDEX=0.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+import csv_reader
+
+INDEX_ENABLED = os.environ.get("FILE_PARSER_INDEX", "1") != "0"
+INDEX_MIN_FILE_SIZE = 10 * 1024**2  # Smaller files can be searched quickly enough without an index
+INDEX_VERSION = 1
+SAMPLE_INTERVAL = 1000  # Number of rows between two index entries
+CHECKSUM_SIZE = 4096  # Number of bytes used to detect whether a file was modified instead of appended to
+
+
+def index_filename(filename):
+    return f"{filename}.index.npz"
+
+
+def _checksum(file, end):
+    # Hash the beginning and the bytes before `end` to detect changes in the part of the file already indexed
+    file.seek(0)
+    checksum = hashlib.sha256(file.read(min(CHECKSUM_SIZE, end)))
+    file.seek(max(0, end - CHECKSUM_SIZE))
+    checksum.update(file.read(min(CHECKSUM_SIZE, end)))
+    return checksum.hexdigest()
+
+
+def _scan(file, index, date_column, delimiter):
+    """
+    Continue indexing the file from the end of the previous scan. Only complete lines are indexed, so a line that is
+    currently being written is picked up by the next update.
+    """
+    timestamps, offsets, rows = [], [], []
+    offset, row, rows_since_sample = index["end_offset"], index["row_count"], index["rows_since_sample"]
+    file.seek(offset)
+    for line in file:
+        if not line.endswith(b"\n"):
+            break
+        if rows_since_sample >= SAMPLE_INTERVAL or index["timestamps"].size + len(timestamps) == 0:
+            date = csv_reader.parse_line_date(line, date_column, delimiter)
+            if date is not None:
+                timestamps.append(date.value)
+                offsets.append(offset)
+                rows.append(row)
+                rows_since_sample = 0
+        offset += len(line)
+        row += 1
+        rows_since_sample += 1
+
+    index["timestamps"] = np.concatenate((index["timestamps"], np.array(timestamps, dtype=np.int64)))
+    index["offsets"] = np.concatenate((index["offsets"], np.array(offsets, dtype=np.int64)))
+    index["rows"] = np.concatenate((index["rows"], np.array(rows, dtype=np.int64)))
+    index["end_offset"], index["row_count"], index["rows_since_sample"] = offset, row, rows_since_sample
+    index["checksum"] = _checksum(file, offset)
+    return index
+
+
+def _new_index(data_start, data_start_row, date_column, delimiter):
+    return {
+        "version": INDEX_VERSION,
+        "data_start": data_start,
+        "data_start_row": data_start_row,
+        "date_column": date_column,
+        "delimiter": delimiter,
+        "timestamps": np.empty(0, dtype=np.int64),
+        "offsets": np.empty(0, dtype=np.int64),
+        "rows": np.empty(0, dtype=np.int64),
+        "end_offset": data_start,
+        "row_count": data_start_row,
+        "rows_since_sample": 0,
+        "checksum": "",
+    }
+
+
+def _load(filename):
+    try:
+        with np.load(index_filename(filename)) as index_file:
+            index = {key: index_file[key] for key in index_file.files}
+    except (OSError, ValueError):
+        return None
+    # Scalars are stored as 0-d arrays
+    for key in (
+        "version",
+        "data_start",
+        "data_start_row",
+        "date_column",
+        "end_offset",
+        "row_count",
+        "rows_since_sample",
+    ):
+        index[key] = int(index[key])
+    index["delimiter"], index["checksum"] = str(index["delimiter"]), str(index["checksum"])
+    return index
+
+
+def _save(filename, index):
+    try:
+        with open(index_filename(filename), "wb") as file:
+            np.savez(file, **index)
+    except OSError as exc:
+        # The data directory might be read-only. We can still use the index for this run.
+        print(f"    Cannot save index file: {exc}")
+
+
+def get_index(file, filename, data_start, data_start_row, date_column, delimiter):
+    """
+    Returns the index of an open csv file. The index is loaded from the sidecar file and updated if rows were appended.
+    It is rebuilt, if the file was modified otherwise or the file layout has changed.
+    """
+    index = _load(filename)
+    file_size = os.fstat(file.fileno()).st_size
+    if (
+        index is None
+        or index["version"] != INDEX_VERSION
+        or (index["data_start"], index["data_start_row"]) != (data_start, data_start_row)
+        or (index["date_column"], index["delimiter"]) != (date_column, delimiter)
+        or index["end_offset"] > file_size
+        or index["checksum"] != _checksum(file, index["end_offset"])
+    ):
+        print(f"    Building index '{index_filename(filename)}'.")
+        index = _scan(file, _new_index(data_start, data_start_row, date_column, delimiter), date_column, delimiter)
+        _save(filename, index)
+    elif index["end_offset"] < file_size:
+        # New rows were appended to the log
+        index = _scan(file, index, date_column, delimiter)
+        _save(filename, index)
+    return index
+
+
+def lookup(index, start, end):
+    """
+    Returns the byte offsets and line numbers of the index entries enclosing the time window [start, end]. The range
+    might contain up to SAMPLE_INTERVAL extra rows on each side. `start` and `end` are UTC timestamps or None.
+    """
+    timestamps = index["timestamps"]
+    # Add the end of the indexed part as the last entry
+    offsets = np.append(index["offsets"], index["end_offset"])
+    rows = np.append(index["rows"], index["row_count"])
+
+    position = np.searchsorted(timestamps, start.value, side="left") if start is not None else 0
+    if position == 0:
+        start_offset, start_row = index["data_start"], index["data_start_row"]
+    else:
+        start_offset, start_row = int(offsets[position - 1]), int(rows[position - 1])
+
+    position = np.searchsorted(timestamps, end.value, side="right") if end is not None else timestamps.size
+    return start_offset, int(offsets[position]), start_row, int(rows[position])
@@ -0,0 +1,303 @@
+"""
+Helper functions to read large csv log files quickly. The logs are written in chronological order, so the rows inside a
+time window can be found without parsing the whole file. Large files are split into blocks of lines, which are parsed
+in parallel.
+The minimum file size for parallel parsing can be set using the environment variable FILE_PARSER_PARALLEL_MIN_SIZE (in
+bytes), the number of workers using FILE_PARSER_JOBS.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import zipfile
+
+import pandas as pd
+
+import csv_index
+import shared_frames
+from worker_pool import is_worker, map_ordered
+
+COMPRESSED_EXTENSIONS = (".zip", ".gz", ".bz2", ".xz", ".zst", ".tar")
+CHUNK_SIZE = 100000  # Number of rows per chunk when reading compressed files
+PARALLEL_MIN_SIZE = int(os.environ.get("FILE_PARSER_PARALLEL_MIN_SIZE", 32 * 1024**2))
+PARALLEL_JOBS = int(os.environ["FILE_PARSER_JOBS"]) if "FILE_PARSER_JOBS" in os.environ else None
+DECOMPRESSORS = {".gz": gzip.decompress, ".bz2": bz2.decompress, ".xz": lzma.decompress}
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+# Options, that cannot be applied to each block separately
+PARALLEL_UNSUPPORTED_OPTIONS = ("nrows", "chunksize", "iterator", "index_col", "skipfooter")
+
+
+def to_utc_timestamp(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def normalize_date_range(date_range):
+    # The crop settings are either (start,) or (start, end)
+    start = to_utc_timestamp(date_range[0]) if date_range[0] is not None else None
+    end = to_utc_timestamp(date_range[1]) if len(date_range) > 1 and date_range[1] is not None else None
+    return start, end
+
+
+def parse_line_date(line, date_column, delimiter):
+    try:
+        return to_utc_timestamp(line.decode("utf-8").split(delimiter)[date_column].strip().strip('"'))
+    except (IndexError, ValueError, UnicodeDecodeError):
+        return None  # Comments and broken lines do not have a date
+
+
+def _next_line_start(file, position, data_start):
+    # Returns the offset of the first line, that starts at or after position
+    if position <= data_start:
+        file.seek(data_start)
+    else:
+        file.seek(position - 1)
+        file.readline()
+    return file.tell()
+
+
+def _first_date_after(file, position, data_start, date_column, delimiter):
+    line_start = _next_line_start(file, position, data_start)
+    while True:
+        line = file.readline()
+        if not line:
+            return line_start, None
+        date = parse_line_date(line, date_column, delimiter)
+        if date is not None:
+            return line_start, date
+        line_start = file.tell()
+
+
+def find_offset(file, timestamp, data_start, file_size, date_column, delimiter, inclusive=True):
+    """
+    Binary search for the byte offset of the first line with a date >= timestamp (or > timestamp if inclusive is
+    False). Only log2(file_size) lines are parsed.
+    """
+    low, high = data_start, file_size
+    while low < high:
+        middle = (low + high) // 2
+        _, date = _first_date_after(file, middle, data_start, date_column, delimiter)
+        if date is not None and (date < timestamp if inclusive else date <= timestamp):
+            low = middle + 1
+        else:
+            high = middle
+    return _next_line_start(file, low, data_start)
+
+
+def _header_lines(kwargs):
+    # The number of lines before the first data row
+    header = kwargs.get("header", "infer")
+    has_header = header == 0 or (header == "infer" and kwargs.get("names") is None)
+    return (kwargs.get("skiprows") or 0) + (1 if has_header else 0)
+
+
+def _data_start(file, kwargs):
+    # Returns the byte offset and line number of the first data row
+    rows = _header_lines(kwargs)
+    for _ in range(rows):
+        file.readline()
+    return file.tell(), rows
+
+
+def _find_range(file, filename, start, end, data_start, data_start_row, date_column, delimiter):
+    file_size = os.fstat(file.fileno()).st_size
+    lower_bound, upper_bound = data_start, file_size
+    if csv_index.INDEX_ENABLED and file_size >= csv_index.INDEX_MIN_FILE_SIZE:
+        # Narrow down the search to the rows between two index entries
+        index = csv_index.get_index(file, filename, data_start, data_start_row, date_column, delimiter)
+        lower_bound, upper_bound, start_row, end_row = csv_index.lookup(index, start, end)
+        if upper_bound == index["end_offset"]:
+            upper_bound = file_size  # Rows appended after the last complete line
+        print(f"    Index lookup: rows {start_row} to {end_row}.")
+
+    start_offset = (
+        find_offset(file, start, lower_bound, upper_bound, date_column, delimiter) if start is not None else lower_bound
+    )
+    end_offset = (
+        find_offset(file, end, start_offset, upper_bound, date_column, delimiter, inclusive=False)
+        if end is not None
+        else upper_bound
+    )
+    return start_offset, end_offset, file_size
+
+
+def _read_uncompressed_range(filename, start, end, date_column, **kwargs):
+    delimiter = kwargs.get("delimiter", kwargs.get("sep", ","))
+    with open(filename, "rb") as file:
+        data_start, data_start_row = _data_start(file, kwargs)
+        start_offset, end_offset, file_size = _find_range(
+            file, filename, start, end, data_start, data_start_row, date_column, delimiter
+        )
+        print(f"    Reading {end_offset - start_offset} of {file_size - data_start} bytes.")
+        # Prepend the header, so that skiprows and header have the same meaning as for the whole file
+        file.seek(0)
+        buffer = file.read(data_start)
+        file.seek(start_offset)
+        buffer += file.read(end_offset - start_offset)
+
+    return read_buffer(buffer, **kwargs)
+
+
+def _read_compressed_range(filename, start, end, **kwargs):
+    # Compressed files cannot be searched, so the file is read in chunks. Only the first and last date of each chunk is
+    # parsed to decide whether it is needed. We stop decompressing, once the end of the window is passed.
+    chunks = []
+    with pd.read_csv(filename, chunksize=CHUNK_SIZE, **kwargs) as reader:
+        for chunk in reader:
+            if chunk.empty:
+                continue
+            if start is not None and to_utc_timestamp(chunk["date"].iloc[-1]) < start:
+                continue
+            if end is not None and to_utc_timestamp(chunk["date"].iloc[0]) > end:
+                break
+            chunks.append(chunk)
+    if not chunks:
+        return pd.read_csv(filename, nrows=0, **kwargs)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_csv_range(filename, date_range, date_column, **kwargs):
+    """
+    Reads the rows of a chronological csv file, that are within date_range. The result may contain a few rows outside
+    of the window, so the caller still has to crop the data. `date_column` is the position of the date in a row.
+    """
+    skiprows = kwargs.get("skiprows")
+    if skiprows is not None and not isinstance(skiprows, int):
+        return pd.read_csv(filename, **kwargs)
+
+    start, end = normalize_date_range(date_range)
+    try:
+        if isinstance(filename, str) and not filename.lower().endswith(COMPRESSED_EXTENSIONS):
+            return _read_uncompressed_range(filename, start, end, date_column, **kwargs)
+        return _read_compressed_range(filename, start, end, **kwargs)
+    except (TypeError, ValueError) as exc:
+        # The dates cannot be compared, e.g. if they are not timestamps
+        print(f"    Cannot read date range, reading the whole file: {exc}")
+        return pd.read_csv(filename, **kwargs)
+
+
+def _split_lines(buffer, start, end, parts):
+    # Split buffer[start:end] into blocks of complete lines
+    boundaries = [start]
+    for part in range(1, parts):
+        position = buffer.find(b"\n", max(start + (end - start) * part // parts, boundaries[-1]), end)
+        if position == -1:
+            break
+        boundaries.append(position + 1)
+    boundaries.append(end)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _can_parse_in_parallel(kwargs):
+    return (
+        (PARALLEL_JOBS or os.cpu_count() or 1) > 1
+        and not is_worker()  # Parse sequentially if the files are already loaded in parallel
+        and isinstance(kwargs.get("skiprows") or 0, int)
+        and kwargs.get("header", "infer") in ("infer", 0, None)
+        and all(kwargs.get(option) is None for option in PARALLEL_UNSUPPORTED_OPTIONS)
+        and kwargs.get("engine") in (None, "c")  # The pyarrow engine is multi-threaded already
+    )
+
+
+def _combine_blocks(blocks):
+    """
+    Concatenates the blocks. The dtypes inferred for each block might differ. Integer and float columns are merged to
+    float, as they would be when parsing the whole file. Returns None for other mismatches, because a column that is
+    numeric in one block and contains strings in another would be parsed as strings only when reading the whole file.
+    """
+    blocks = [block for block in blocks if not block.empty] or blocks[:1]
+    for column in blocks[0].columns:
+        dtypes = {block[column].dtype for block in blocks}
+        if len(dtypes) > 1 and not all(
+            pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in dtypes
+        ):
+            return None
+    return pd.concat(blocks, ignore_index=True)
+
+
+def read_buffer(buffer, **kwargs):
+    """
+    Parses a csv file in memory. Large files are split into blocks of lines, which are parsed in parallel. Each block
+    is prefixed with the header of the file, so the options have the same meaning as for the whole file. The result is
+    identical to pd.read_csv(). Quoted fields containing line breaks are not supported.
+    """
+    if len(buffer) < PARALLEL_MIN_SIZE or not _can_parse_in_parallel(kwargs):
+        return pd.read_csv(io.BytesIO(buffer), **kwargs)
+
+    data_start = 0
+    for _ in range(_header_lines(kwargs)):
+        data_start = buffer.find(b"\n", data_start) + 1
+    jobs = PARALLEL_JOBS or os.cpu_count()
+    blocks = _split_lines(buffer, data_start, len(buffer), jobs)
+    print(f"    Parsing {len(buffer)} bytes in {len(blocks)} blocks.")
+
+    # The forked workers inherit the buffer, only the parsed blocks are sent back
+    header = buffer[:data_start]
+    blocks = map_ordered(
+        lambda block: pd.read_csv(io.BytesIO(header + buffer[block[0] : block[1]]), **kwargs), blocks, jobs=jobs
+    )
+    data = _combine_blocks(blocks)
+    del blocks
+    shared_frames.release()  # The blocks were copied
+    if data is None:
+        print("    The dtypes of the blocks differ. Parsing the whole file.")
+        return pd.read_csv(io.BytesIO(buffer), **kwargs)
+    return data
+
+
+def read_csv(filename, **kwargs):
+    """
+    A drop-in replacement for pd.read_csv(), that parses large uncompressed and zipped files in parallel.
+    """
+    if not isinstance(filename, str) or not _can_parse_in_parallel(kwargs):
+        return pd.read_csv(filename, **kwargs)
+
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(filename) as archive:
+            members = archive.infolist()
+            if len(members) != 1 or members[0].file_size < PARALLEL_MIN_SIZE:
+                return pd.read_csv(filename, **kwargs)
+            return read_buffer(archive.read(members[0]), **kwargs)
+
+    if filename.lower().endswith(COMPRESSED_EXTENSIONS) or os.path.getsize(filename) < PARALLEL_MIN_SIZE:
+        return pd.read_csv(filename, **kwargs)
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return read_buffer(buffer, **kwargs)
+
+
+def read_bytes(filename):
+    """
+    Returns the contents of a file. Zip archives with a single member and gzip, bz2 or xz compressed files are
+    decompressed.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".zip":
+        with zipfile.ZipFile(filename) as archive:
+            members = archive.infolist()
+            if len(members) != 1:
+                raise ValueError(f"Zip archive must contain exactly one file: {filename}")
+            return archive.read(members[0])
+    with open(filename, "rb") as file:
+        contents = file.read()
+    return DECOMPRESSORS[extension](contents) if extension in DECOMPRESSORS else contents
+
+
+def read_head(filename, size):
+    """
+    Returns the first `size` bytes of a file. Like read_bytes(), compressed files are decompressed, but only as far as
+    needed.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".zip":
+        with zipfile.ZipFile(filename) as archive:
+            members = archive.infolist()
+            if len(members) != 1:
+                raise ValueError(f"Zip archive must contain exactly one file: {filename}")
+            with archive.open(members[0]) as file:
+                return file.read(size)
+    with OPENERS.get(extension, open)(filename, "rb") as file:
+        return file.read(size)
@@ -0,0 +1,96 @@
+"""
+Conversion of the date columns of the log files. Parsing the dates dominates the load time of large logs, so the format
+is inferred once from the first rows and the whole column is then converted using this explicit format. ISO 8601 dates
+are converted by pyarrow, which is more than an order of magnitude faster than pandas. For other formats, only the
+unique values are parsed, if the same dates are repeated.
+"""
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+SAMPLE_SIZE = 1000  # Number of rows used to infer the format
+UNIQUE_RATIO = 0.5  # Parse only the unique values, if less than this fraction of the sample is unique
+
+
+def infer_format(sample, utc=True):
+    """
+    Returns a format string that parses all dates in the sample or None if no common format was found.
+    """
+    if sample.empty:
+        return None
+    guessed_format = guess_datetime_format(sample.iloc[0])
+    if guessed_format is None:
+        return None
+    # ISO 8601 dates may have a varying number of fractional digits, which a format string derived from a single date
+    # would not match.
+    candidates = ("ISO8601", guessed_format) if guessed_format.startswith("%Y-%m-%d") else (guessed_format,)
+    for candidate in candidates:
+        try:
+            pd.to_datetime(sample, utc=utc, format=candidate)
+        except (TypeError, ValueError):
+            continue
+        return candidate
+    return None
+
+
+def lookup(dates, date_format=None, utc=True):
+    """
+    This is an extremely fast approach to datetime parsing.
+    For large data, the same dates are often repeated. Rather than
+    re-parse these, we store all unique dates, parse them, and
+    use a lookup to convert all dates.
+    """
+    codes, unique_dates = pd.factorize(dates)
+    parsed_dates = pd.DatetimeIndex(pd.to_datetime(unique_dates, utc=utc, format=date_format))
+    return pd.Series(parsed_dates.take(codes, allow_fill=True, fill_value=pd.NaT), index=dates.index, name=dates.name)
+
+
+def _parse_iso8601(dates):
+    # Returns None if pyarrow is not installed or cannot parse the dates
+    try:
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    try:
+        array = pa.array(dates, type=pa.string(), from_pandas=True)
+        try:
+            result = array.cast(pa.timestamp("ns", tz="UTC")).to_pandas()
+        except pa.ArrowInvalid:
+            # Dates without a timezone are UTC
+            result = array.cast(pa.timestamp("ns")).to_pandas().dt.tz_localize("UTC")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    return pd.Series(result.array, index=dates.index, name=dates.name)
+
+
+def parse_dates(dates, date_format=None, utc=True):
+    """
+    Converts a Series of date strings to datetimes. If no date_format is given, it is inferred from the first rows.
+    Columns, that are already converted, for example by the pyarrow csv engine, are returned as they are.
+    """
+    if not (pd.api.types.is_object_dtype(dates) or pd.api.types.is_string_dtype(dates)):
+        return pd.to_datetime(dates, utc=utc)
+
+    sample = dates.head(SAMPLE_SIZE).dropna()
+    if date_format is None:
+        date_format = infer_format(sample, utc)
+
+    if date_format == "ISO8601" and utc:
+        result = _parse_iso8601(dates)
+        if result is not None:
+            print("    Parsed dates using the ISO 8601 fast path.")
+            return result
+
+    use_lookup = sample.nunique() < len(sample) * UNIQUE_RATIO
+    try:
+        if use_lookup:
+            result = lookup(dates, date_format, utc)
+        else:
+            result = pd.to_datetime(dates, utc=utc, format=date_format)
+    except (TypeError, ValueError) as exc:
+        reason = str(exc).splitlines()[0]
+        print(f"    Cannot parse dates using the format '{date_format}', parsing each date individually: {reason}")
+        return pd.to_datetime(dates, utc=utc, format="mixed")
+
+    method = f"format '{date_format}'" if date_format is not None else "format inferred by pandas"
+    print(f"    Parsed dates using the {method}{' and a lookup of the unique values' if use_lookup else ''}.")
+    return result
@@ -0,0 +1,248 @@
+"""
+An on-disk cache for the results of file_parser.parse_file(). Parsing the zipped csv files is by far the most expensive
+part of building a figure, so the parsed DataFrames are stored in the parquet format and reused as long as neither the
+data file, the parser nor its options have changed.
+The cache can be disabled by setting the environment variable FILE_PARSER_CACHE=0, the location can be changed using
+FILE_PARSER_CACHE_DIR.
+"""
+import datetime
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import re
+import types
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1  # Increment this to invalidate all existing cache entries
+CACHE_DIRECTORY = os.environ.get(
+    "FILE_PARSER_CACHE_DIR", os.path.join(os.path.dirname(os.path.realpath(__file__)), ".cache", "file_parser")
+)
+CACHE_ENABLED = os.environ.get("FILE_PARSER_CACHE", "1") != "0"
+PROJECT_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+# The project modules imported by a module, directly or by lazy_import()
+IMPORT_REGEX = re.compile(r'^\s*(?:import|from)\s+(\w+)|lazy_import\("(\w+)"\)', re.MULTILINE)
+# Values, whose repr() is complete and does not contain a memory address
+REPR_TYPES = (
+    type(None),
+    bool,
+    int,
+    float,
+    complex,
+    str,
+    bytes,
+    range,
+    slice,
+    np.generic,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    pd.Timestamp,
+    pd.Timedelta,
+)
+
+_file_hashes = {}
+
+
+def hash_file(filename):
+    # Each file is only hashed once per process, e.g. for detecting its format and for caching the parsed result
+    stat = os.stat(filename)
+    memo_key = (os.path.realpath(filename), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_hashes:
+        with open(filename, "rb") as file:
+            _file_hashes[memo_key] = hashlib.file_digest(file, "sha256").hexdigest()
+    return _file_hashes[memo_key]
+
+
+def _module_fingerprint(name, seen):
+    # The source of a project module and of the project modules it imports, so that changing a helper like
+    # csv_reader.read_csv() invalidates the results of the parsers using it. Other packages are not followed.
+    path = os.path.join(PROJECT_DIRECTORY, f"{name}.py")
+    if name in seen or not os.path.isfile(path):
+        return ""
+    seen.add(name)
+    parts = [f"{name}:{hash_file(path)}"]
+    with open(path, encoding="utf-8") as file:
+        for match in IMPORT_REGEX.finditer(file.read()):
+            parts.append(_module_fingerprint(match.group(1) or match.group(2), seen))
+    return "|".join(part for part in parts if part)
+
+
+def _constants_repr(code):
+    constants = (_constants_repr(const) if inspect.iscode(const) else repr(const) for const in code.co_consts)
+    return f"{code.co_code.hex()}({','.join(constants)})"
+
+
+def _function_fingerprint(function, seen):
+    # Use the source code if available, because the bytecode changes between Python versions. Lambdas defined inside
+    # the plot configs return the whole line, which is fine, because we only need to detect changes.
+    try:
+        parts = [inspect.getsource(function)]
+    except (OSError, TypeError):
+        # The repr() of nested code objects contains their memory address
+        parts = [_constants_repr(function.__code__)]
+    seen.add(function)
+
+    # Values captured by a closure, like the window length of a filter, change the result as well
+    for cell in function.__closure__ or ():
+        parts.append(canonicalize(cell.cell_contents, seen))
+
+    # Follow all helper functions called by the function, e.g. convertResistanceToTemperature(), the modules used by it,
+    # e.g. csv_reader or a lazy_import() placeholder, and the global constants like CSV_SCHEMAS
+    code_objects = [function.__code__]
+    while code_objects:
+        code = code_objects.pop()
+        code_objects.extend(const for const in code.co_consts if inspect.iscode(const))
+        for name in code.co_names:
+            if name not in function.__globals__:
+                continue
+            referenced_object = function.__globals__[name]
+            if inspect.isfunction(referenced_object):
+                if referenced_object not in seen:
+                    parts.append(_function_fingerprint(referenced_object, seen))
+            elif isinstance(referenced_object, types.ModuleType):
+                parts.append(_module_fingerprint(referenced_object.__name__, seen))
+            elif inspect.isclass(referenced_object):
+                parts.append(_module_fingerprint(referenced_object.__module__, seen))
+            else:
+                try:
+                    parts.append(f"{name}={canonicalize(referenced_object, seen)}")
+                except TypeError:
+                    # Fall back to the source of the module defining the constant
+                    parts.append(_module_fingerprint(function.__module__, seen))
+
+    return "|".join(parts)
+
+
+def canonicalize(value, seen=None):
+    """
+    Returns a string representation of the parser options, that does not depend on the order of dict keys or the memory
+    address of functions. Raises a TypeError for values, that cannot be represented completely.
+    """
+    seen = set() if seen is None else seen
+    if isinstance(value, dict):
+        items = (f"{canonicalize(key, seen)}:{canonicalize(item, seen)}" for key, item in value.items())
+        return "{" + ",".join(sorted(items)) + "}"
+    if isinstance(value, (list, tuple, type({}.keys()), type({}.values()))):
+        return "[" + ",".join(canonicalize(item, seen) for item in value) + "]"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(canonicalize(item, seen) for item in value)) + "}"
+    if inspect.isfunction(value):
+        if value in seen:
+            return f"<function {value.__name__}>"
+        return f"<function {_function_fingerprint(value, seen)}>"
+    if isinstance(value, functools.partial):
+        arguments = f"{canonicalize(value.args, seen)} {canonicalize(value.keywords, seen)}"
+        return f"<partial {canonicalize(value.func, seen)} {arguments}>"
+    if isinstance(value, (types.BuiltinFunctionType, np.ufunc)):
+        return f"<builtin {getattr(value, '__module__', None)}.{value.__name__}>"
+    # The dtypes passed to read_csv(), e.g. np.uint8 or float
+    is_scalar_type = inspect.isclass(value) and (
+        issubclass(value, np.generic) or value in (bool, int, float, complex, str)
+    )
+    if isinstance(value, np.dtype) or is_scalar_type:
+        return f"<dtype {np.dtype(value).str}>"
+    if isinstance(value, re.Pattern):
+        return f"<regex {value.pattern!r} {value.flags}>"
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return f"<ndarray {value.dtype} {value.shape} {digest}>"
+    if isinstance(value, REPR_TYPES):
+        return repr(value)
+    # The repr() of other objects may be truncated or contain their memory address
+    raise TypeError(f"Cannot use a value of type {type(value).__name__} in the cache key.")
+
+
+def _data_files(filename):
+    # Some formats store the data next to the file passed to the parser, e.g. the R&S '<name>.Wfm.bin' files
+    base, extension = os.path.splitext(filename)
+    if extension.lower() == ".bin" and os.path.isfile(f"{base}.Wfm.bin"):
+        return [filename, f"{base}.Wfm.bin"]
+    return [filename]
+
+
+def cache_key(filename, parser_name, parser_function, **kwargs):
+    key = hashlib.sha256()
+    key.update(f"v{CACHE_VERSION}".encode())
+    for data_file in _data_files(filename):
+        key.update(hash_file(data_file).encode())
+    key.update(parser_name.encode())
+    key.update(canonicalize(parser_function).encode())
+    key.update(canonicalize(kwargs).encode())
+    return key.hexdigest()
+
+
+def _cache_paths(key):
+    return os.path.join(CACHE_DIRECTORY, f"{key}.parquet"), os.path.join(CACHE_DIRECTORY, f"{key}.pickle")
+
+
+def load(key):
+    data_path, metadata_path = _cache_paths(key)
+    try:
+        with open(metadata_path, "rb") as file:
+            is_dataframe, metadata = pickle.load(file)
+        if not is_dataframe:
+            return metadata
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    try:
+        return pd.read_parquet(data_path), metadata
+    except Exception:  # pylint: disable=broad-except
+        # A truncated or corrupt entry, e.g. pyarrow.ArrowInvalid, is parsed again and replaced
+        return None
+
+
+def _replace_atomically(path, write_function):
+    # Write to a temporary file first, so that an interrupted build does not leave a corrupt cache entry behind
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write_function(temporary_path)
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def _write_pickle(path, value):
+    with open(path, "wb") as file:
+        pickle.dump(value, file)
+
+
+def store(key, result):
+    data_path, metadata_path = _cache_paths(key)
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+
+    is_dataframe = isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], pd.DataFrame)
+    try:
+        if is_dataframe:
+            _replace_atomically(data_path, result[0].to_parquet)
+        cache_entry = (is_dataframe, result[1] if is_dataframe else result)
+        _replace_atomically(metadata_path, lambda path: _write_pickle(path, cache_entry))
+    except Exception as exc:  # pylint: disable=broad-except
+        # Not every DataFrame can be serialized, e.g. columns of mixed types. This is not an error, we just do not
+        # cache.
+        print(f"    Cannot cache parser result: {exc}")
+
+
+def cached_parse(parser_name, parser_function, filename, **kwargs):
+    if not CACHE_ENABLED or not os.path.isfile(filename):
+        # Some parsers like concat_series or noise_gen do not read a file directly
+        return parser_function(filename=filename, **kwargs)
+
+    try:
+        key = cache_key(filename, parser_name, parser_function, **kwargs)
+    except TypeError as exc:
+        # Without a complete key a stale result might be returned
+        print(f"    Not caching: {exc}")
+        return parser_function(filename=filename, **kwargs)
+    result = load(key)
+    if result is not None:
+        print("    Using cached result.")
+        return result
+
+    result = parser_function(filename=filename, **kwargs)
+    store(key, result)
+    return result
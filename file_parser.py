@@ -1,39 +1,137 @@
 from __future__ import division
 
 import datetime
+import dis
+import inspect
 import io
 import os
 import re
 
-import lmfit as lmfit
-from scipy import signal
-from itertools import islice
-
-import dateutil
 import numpy as np
 import pandas as pd
-import zipfile
+
+import csv_reader
+import file_cache
+import frame_memo
+from date_parser import parse_dates
+from lazy_import import lazy_import
+from worker_pool import map_ordered
+
+# The modules used by a few parsers only are imported, when one of these parsers is called
+block_average = lazy_import("block_average")
+dateutil_parser = lazy_import("dateutil.parser")
+format_detection = lazy_import("format_detection")
+frequency_estimation = lazy_import("frequency_estimation")
+lock_in = lazy_import("lock_in")
+logic_analysis = lazy_import("logic_analysis")
+ltspice_raw = lazy_import("ltspice_raw")
+outliers = lazy_import("outliers")
+scaling_expressions = lazy_import("scaling_expressions")
+scope_waveforms = lazy_import("scope_waveforms")
+sensors = lazy_import("sensors")
+validity = lazy_import("validity")
+
+
+def get_scaling_columns(scaling_functions):
+    """
+    Returns the names of all columns referenced by the scaling functions. Only expressions and lambdas, that access the
+    DataFrame via data["column"] or data.column can be analysed. If any other function or access of the DataFrame is
+    found, None is returned, because all columns might be required.
+    """
+    columns = set()
+    for scaling_function in scaling_functions.values():
+        if isinstance(scaling_function, str):
+            columns |= scaling_expressions.expression_columns(scaling_function)
+            continue
+        code = getattr(scaling_function, "__code__", None)
+        if scaling_function.__name__ != "<lambda>" or code is None or code.co_argcount != 1 or code.co_cellvars:
+            return None
+        argument = code.co_varnames[0]
+        instructions = list(dis.get_instructions(code))
+        for i, instruction in enumerate(instructions):
+            if not instruction.opname.startswith("LOAD_FAST"):
+                continue
+            if instruction.argval != argument:
+                if isinstance(instruction.argval, tuple) and argument in instruction.argval:
+                    return None  # Newer Python versions load multiple variables at once
+                continue
+            if i + 2 >= len(instructions):
+                return None  # The DataFrame is returned as it is, e.g. lambda data: data
+            next_instruction, subscript = instructions[i + 1], instructions[i + 2]
+            if next_instruction.opname in ("LOAD_ATTR", "LOAD_METHOD"):
+                if next_instruction.opname == "LOAD_METHOD" or hasattr(pd.DataFrame, next_instruction.argval):
+                    return None  # A method or attribute of the DataFrame like data.rolling() or data.loc
+                columns.add(next_instruction.argval)
+            elif (
+                next_instruction.opname == "LOAD_CONST"
+                and isinstance(next_instruction.argval, str)
+                and (subscript.opname == "BINARY_SUBSCR" or subscript.argrepr == "[]")
+            ):
+                columns.add(next_instruction.argval)
+            else:
+                # The DataFrame is used as a whole, e.g. len(data)
+                return None
+    return columns
+
+
+def scale_data(data, options, mode="frame", existing_only=False):
+    """
+    The scaling step of the parsers. The sensors are converted first, so that the scaling functions and expressions can
+    use the temperatures. The outliers are removed from the unscaled values of the whole file, like the filters of the
+    LM399 parsers did. See apply_scaling() for `mode` and `existing_only`, a `mode` of None skips the scaling.
+    """
+    if options.get("sensors"):
+        data = sensors.convert_sensors(data, options["sensors"])
+    if options.get("remove_outliers"):
+        data = outliers.remove_outliers(data, options["remove_outliers"])
+    if mode is not None:
+        scaling_expressions.apply_scaling(data, options.get("scaling", {}), mode, existing_only)
+    return data
+
+
+def _applies_stages(function, depth=1):
+    # Whether the parser, or a function called by it like parse_schema_file(), calls scale_data()
+    function = getattr(function, "func", function)  # functools.partial
+    code = getattr(function, "__code__", None)
+    if code is None:
+        return False
+    if "scale_data" in code.co_names:
+        return True
+    return depth > 0 and any(
+        _applies_stages(function.__globals__.get(name), depth - 1)
+        for name in code.co_names
+        if inspect.isfunction(function.__globals__.get(name))
+    )
 
 
-def lookup(s):
+def read_csv(filename, columns=None, required=("date",), date_range=None, **kwargs):
     """
-    This is an extremely fast approach to datetime parsing.
-    For large data, the same dates are often repeated. Rather than
-    re-parse these, we store all unique dates, parse them, and
-    use a lookup to convert all dates.
+    A wrapper around pd.read_csv(), that only reads the columns requested by the plot. The columns in `required` are
+    always read, because the parser needs them. `usecols` and `names` must be given as pairs.
+    If a date_range is given and the file has a date column, only the rows in this time window are read. There might be
+    a few rows outside the window, so the data must still be cropped. Large files are parsed in parallel.
+    The result is memoized, so parsers reading the same file with the same options share the raw frame.
     """
-    dates = {date: pd.to_datetime(date) for date in s.unique()}
-    return s.map(dates)
+    if columns is not None:
+        selected = [
+            (column, name)
+            for column, name in zip(kwargs["usecols"], kwargs["names"])
+            if name in columns or name in required
+        ]
+        kwargs["usecols"] = [column for column, _ in selected]
+        kwargs["names"] = [name for _, name in selected]
+        if isinstance(kwargs.get("dtype"), dict):
+            kwargs["dtype"] = {name: dtype for name, dtype in kwargs["dtype"].items() if name in kwargs["names"]}
+
+    return frame_memo.memoized_read(_read_csv, filename, date_range=date_range, **kwargs)
 
 
-def calculate_plc100(data):
-    #    groups_of_ten = pd.Series(np.repeat(range(int(len(data)/10)), 10))
-    #    grouped = data.groupby(pd.Grouper(key='date', freq='400ms'))
-    #    print(data.groupby(data.index // 10).mean())
-    #    print(data.date.groupby(data.index // 10).first())
-    new_data = data.groupby(data.index // 10).mean()
-    new_data["date"] = data.date.groupby(data.index // 10).first()
-    return new_data
+def _read_csv(filename, date_range=None, **kwargs):
+    if date_range is not None and "date" in kwargs["names"]:
+        date_column = list(kwargs["usecols"])[list(kwargs["names"]).index("date")]
+        return csv_reader.read_csv_range(filename, date_range, date_column=date_column, **kwargs)
+
+    return csv_reader.read_csv(filename, **kwargs)
 
 
 def parse_Keysight34470A_file(filename, options, **kwargs):
@@ -41,7 +139,7 @@ def parse_Keysight34470A_file(filename, options, **kwargs):
     header = pd.read_csv(filename, nrows=2, delimiter=options.get("delimiter", ","), header=None)
     sample_interval = float(header.at[1, 1])
     # Use UTC -1 for all dates *before* 2017-05-09
-    start_date = dateutil.parser.parse("{date} {time} UTC".format(date=header.at[0, 1], time=header.at[0, 3]))
+    start_date = dateutil_parser.parse("{date} {time} UTC".format(date=header.at[0, 1], time=header.at[0, 3]))
     start_date_ts = start_date.replace(tzinfo=datetime.timezone.utc).timestamp()
 
     data = pd.read_csv(
@@ -60,16 +158,15 @@ def parse_Keysight34470A_file(filename, options, **kwargs):
     )
 
     data["date"] = pd.to_datetime(data["date"] * sample_interval + start_date_ts, unit="s")
-    data = data[abs(data[options.get("value_name", "value")]) < 9.90000000e37]  # Drop out of bounds
+    validity.mask_invalid(data, [options.get("value_name", "value")])  # Mask the overflow readings
     data["date"] = data["date"].dt.tz_localize("utc")
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        data[key] = scaling_function(data)
+    data = scale_data(data, options)
 
     return data, {"sample_interval": sample_interval}
 
 
-def parse_3458A_file(filename, options=None):
+def parse_3458A_file(filename, options=None, **kwargs):
     data = pd.read_csv(
         filename,
         skiprows=1,
@@ -88,7 +185,7 @@ def parse_3458A_file(filename, options=None):
     return data
 
 
-def parse_tera_term_file(filename, options=None):
+def parse_tera_term_file(filename, options=None, **kwargs):
     data = pd.read_csv(
         filename,
         skiprows=0,
@@ -104,7 +201,7 @@ def parse_tera_term_file(filename, options=None):
     return data
 
 
-def parse_csv_thomasS(filename, options=None):
+def parse_csv_thomasS(filename, options=None, **kwargs):
     data = pd.read_csv(
         filename,
         comment="#",
@@ -117,15 +214,15 @@ def parse_csv_thomasS(filename, options=None):
     )
     # The date parser function (Timezone will be parsed as UTC to UTC) used for testing.
     # dateparser = lambda dates:pd.to_datetime(dates, utc=True)
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    data["date"] = parse_dates(data["date"])  # It is faster to parse the dates *after* parsing the csv file
     return data
 
 
-def parse_csv_thomasS_2(filename, options=None):
-    data = pd.read_csv(
+def parse_csv_thomasS_2(filename, options=None, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 2, 3],
@@ -133,15 +230,16 @@ def parse_csv_thomasS_2(filename, options=None):
     )  # , nrows=40000)
     # The date parser function (Timezone will be parsed as UTC to UTC) used for testing.
     # dateparser = lambda dates:pd.to_datetime(dates, utc=True)
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    data["date"] = parse_dates(data["date"])  # It is faster to parse the dates *after* parsing the csv file
     return data
 
 
-def parse_smi_file(filename, options, **kwargs):
-    data = pd.read_csv(
+def parse_smi_file(filename, options, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
+        required=("date", "sensor_id"),
         comment="#",
         header=0,
         usecols=[0, 1, 2, 3],
@@ -155,17 +253,14 @@ def parse_smi_file(filename, options, **kwargs):
 
     # The date parser function (Timezone will be parsed as UTC to UTC) used for testing.
     # dateparser = lambda dates:pd.to_datetime(dates, utc=True)
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
-    for key, scaling_function in options.get("scaling", {}).items():
-        data[key] = scaling_function(data)
+    data["date"] = parse_dates(data["date"])  # It is faster to parse the dates *after* parsing the csv file
+    data = scale_data(data, options)
 
     return data, 0
 
 
 def parse_fluke1524_file(filename, options, **kwargs):
-    data = pd.read_csv(
+    data = read_csv(
         filename,
         delimiter=",",
         header=None,
@@ -185,7 +280,7 @@ def parse_fluke1524_file(filename, options, **kwargs):
         data.drop(columns="sensor_id", inplace=True)
 
     # Parse date of format "2022-11-01 08:09:17.820169"
-    data["date"] = pd.to_datetime(data["date"] + ' ' + data.pop("time"), format="%Y-%m-%d %H:%M:%S.%f")
+    data["date"] = parse_dates(data["date"] + " " + data.pop("time"), date_format="%Y-%m-%d %H:%M:%S.%f", utc=False)
 
     data = data.reindex(columns=["date", "temperature"])
     # Data before 2018-03-15 18:00 was recorded with the wrong timezone
@@ -194,165 +289,98 @@ def parse_fluke1524_file(filename, options, **kwargs):
     else:
         data["date"] = data["date"].dt.tz_localize("Europe/Berlin").dt.tz_convert("utc")
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        data[key] = scaling_function(data)
+    data = scale_data(data, options)
 
     return data, 0
 
 
-def parse_RSA306_file(filename, options):
-    # String looks like this:
-    # >>> print(repr(line))
-    # 'Resolution Bandwidth,4,Hz\n'
-    regex_rbw = re.compile(r"^Resolution Bandwidth\,([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\,([A-Za-z]+)\n$")
-    # String looks like this:
-    # >>> print(repr(line))
-    # 'Trace 1\n'
-    regex_number_of_traces = re.compile(r"^Trace ([0-9]+)\n$")
-    # String looks like this:
-    # >>> print(repr(line))
-    # 'XStart,0,Hz\n'
-    regex_trace = re.compile(r"^Trace ([0-9]),,([A-Za-z]+),[-+]?[0-9]*\.?[0-9]+,[-+]?[0-9]*\.?[0-9]+\n$")
-    # String looks like this:
-    # >>> print(repr(line))
-    # 'NumberPoints,64001\n'
-    regex_number_of_points = re.compile(r"^NumberPoints\,([0-9]+)\n$")
-    # String looks like this:
-    # >>> print(repr(line))
-    # 'XStart,0,Hz\n'
-    regex_start = re.compile(r"^XStart,([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?),([A-Za-z]+)\n$")
-    # String looks like this:
-    # >>> print(repr(line))
-    # 'XStop,1000000,Hz\n'
-    regex_end = re.compile(r"^XStop,([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?),([A-Za-z]+)\n$")
-    # String looks like this:
-    # >>> print(repr(line))
-    # '-30.208715438842773\n'
-    # OR in the latest version
-    # '0.0025581971276551485,0.000\n'
-    regex_value = re.compile(
-        r"^([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)(?:\,[-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)?\n$"
-    )
-    # String looks like this:
-    # >>> print(repr(line))
-    # '-30.208715438842773\n'
-    # OR in the latest version
-    # '0.0025581971276551485,0.000\n'
-    regex_value = re.compile(
-        r"^([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)(\,[-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)?\n$"
-    )
-
-    selected_trace = options.get("trace", 1)
-
-    rbw = None
-    number_of_traces = 0
-    start_of_data = None
-
-    number_of_points = None
-    start_point = None
-    end_point = None
-    has_index = None
-    trace_unit = None
-    with open(filename) as lines:
-        enumerated_lines = enumerate(lines)  # We need the itarator to skip lines
-        for row_num, line in enumerated_lines:
-            if rbw is None and regex_rbw.match(line):
-                rbw = float(regex_rbw.match(line).group(1))
-                unit = regex_rbw.match(line).group(2)
-                print(f"  Resolution Bandwidth: {rbw} {unit}")
-                continue
-            if regex_number_of_traces.match(line):
-                # We need to enter this regex multiple times, because there is no distinct line that has the number
-                # of rows, so we misuse the trace parameters to find the highest trace number
-                number_of_traces = max(int(regex_number_of_traces.match(line).group(1)), number_of_traces)
-                continue
-            if start_of_data is None and line == "[Traces]\n":
-                print(f"  Number of traces in file: {number_of_traces}")  # We now know the number of total traces
-                if selected_trace > number_of_traces:
-                    raise TypeError("Selected trace is larger than the number of available traces!")
-                next(enumerated_lines)  # Skip '[Trace]\n'
-            if regex_trace.match(line):
-                # We have found a trace
-                # parse the header and check whether we need it
-                match = regex_trace.match(line)
-                current_trace, trace_unit = int(match.group(1)), match.group(2)
-                row_num, line = next(enumerated_lines)
-                number_of_points = int(regex_number_of_points.match(line).group(1))
-                if current_trace != selected_trace:
-                    # skip number_of_points +2 two rows of the header
-                    islice(enumerated_lines, number_of_points + 2, None)
-                else:
-                    row_num, line = next(enumerated_lines)
-                    match = regex_start.match(line)
-                    start_point = float(match.group(1))
-                    unit = match.group(2)
-                    print(f"  Starting point: {start_point} {unit}")
-                    row_num, line = next(enumerated_lines)
-                    end_point = float(regex_end.match(line).group(1))
-                    print(f"  End point: {end_point} {unit}")
-                    # Next row is the first trace
-                    row_num, line = next(enumerated_lines)
-                    has_index = regex_value.match(line).group(2)
-                    start_of_data = row_num
-                    break
-
-    #    with open(filename) as lines:
-    #        for row_num, line in enumerate(islice(lines, start_of_data, None)):
-    #            if start_point is None and regex_start.match(line):
-    #                start_point = float(regex_start.match(line).group(1))
-    #                unit = regex_start.match(line).group(2)
-    #                print(f"  Starting point: {start_point} {unit}")
-    #                continue
-    #            if number_of_points is None and regex_number_of_points.match(line):
-    #                number_of_points = int(regex_number_of_points.match(line).group(1))
-    #                continue
-    #            if end_point is None and regex_end.match(line):
-    #                end_point = float(regex_end.match(line).group(1))
-    #                print(f"  End point: {end_point} {unit}")
-    #                continue
-    #            if regex_value.match(line):
-    #                has_index = regex_value.match(line).group(2)
-    #                start_of_data = row_num + start_of_data
-    #                break
-
-    data = None
-    if has_index is not None:
-        data = pd.read_csv(
-            filename,
+# A number as written by the RSA306 software, e.g. '-30.208715438842773' or '1.5e-3'
+RSA306_NUMBER = rb"[-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?"
+# String looks like this:
+# >>> print(repr(line))
+# 'Resolution Bandwidth,4,Hz\n'
+RSA306_RBW_REGEX = re.compile(rb"^Resolution Bandwidth,(" + RSA306_NUMBER + rb"),([A-Za-z]+)\r?$", re.MULTILINE)
+# Each trace starts with a header like this:
+# 'Trace 1,,dBm,0,1000000\n'
+# 'NumberPoints,64001\n'
+# 'XStart,0,Hz\n'
+# 'XStop,1000000,Hz\n'
+# followed by the values '-30.208715438842773\n' or in the latest version '0.0025581971276551485,0.000\n'
+RSA306_TRACE_REGEX = re.compile(
+    rb"^Trace ([0-9]+),,([A-Za-z]+),[^\r\n]*\r?\n"
+    rb"NumberPoints,([0-9]+)\r?\n"
+    rb"XStart,(" + RSA306_NUMBER + rb"),([A-Za-z]+)\r?\n"
+    rb"XStop,(" + RSA306_NUMBER + rb"),[A-Za-z]+\r?\n",
+    re.MULTILINE,
+)
+
+
+def read_RSA306_traces(filename):
+    """
+    Returns all traces of an RSA306 export in a single pass over the decompressed file. The rows are indexed by trace
+    number and row, the columns are "psd" and "frequency", which is NaN for exports without frequencies. The
+    resolution bandwidth and the settings of each trace are stored in data.attrs.
+    """
+    buffer = csv_reader.read_bytes(filename)
+    match = RSA306_RBW_REGEX.search(buffer)
+    if match is None:
+        raise TypeError(f"Invalid data file, no resolution bandwidth found: {filename}")
+    attrs = {"rbw": float(match.group(1)), "rbw_unit": match.group(2).decode(), "traces": {}}
+
+    headers = list(RSA306_TRACE_REGEX.finditer(buffer))
+    traces = {}
+    for header, next_header in zip(headers, headers[1:] + [None]):
+        trace, number_of_points = int(header.group(1)), int(header.group(3))
+        # Decode the values straight from the buffer
+        trace_data = pd.read_csv(
+            io.BytesIO(buffer[header.end() : next_header.start() if next_header is not None else len(buffer)]),
             delimiter=",",
             header=None,
-            skiprows=start_of_data,
             nrows=number_of_points,
-            usecols=[0, 1],
-            names=["psd", "frequency"],
-            index_col=1,
         )
+        traces[trace] = trace_data.reindex(columns=[0, 1]).set_axis(["psd", "frequency"], axis="columns")
+        attrs["traces"][trace] = {
+            "unit": header.group(2).decode(),
+            "start": float(header.group(4)),
+            "stop": float(header.group(6)),
+            "x_unit": header.group(5).decode(),
+        }
+
+    data = pd.concat(traces, names=["trace", "row"]) if traces else pd.DataFrame(columns=["psd", "frequency"])
+    data.attrs = attrs
+    return data
+
+
+def parse_RSA306_file(filename, options, **kwargs):
+    selected_trace = options.get("trace", 1)
+
+    traces = frame_memo.memoized_read(read_RSA306_traces, filename)
+    rbw, settings = traces.attrs["rbw"], traces.attrs["traces"]
+    print(f"  Resolution Bandwidth: {rbw} {traces.attrs['rbw_unit']}")
+    print(f"  Number of traces in file: {len(settings)}")
+    if selected_trace not in settings:
+        raise TypeError("Selected trace is larger than the number of available traces!")
+    settings = settings[selected_trace]
+    print(f"  Starting point: {settings['start']} {settings['x_unit']}")
+    print(f"  End point: {settings['stop']} {settings['x_unit']}")
+
+    data = traces.loc[selected_trace]
+    if data["frequency"].notna().all():
+        data = data.set_index("frequency")
     else:
-        data = pd.read_csv(
-            filename,
-            delimiter=",",
-            header=None,
-            skiprows=start_of_data,
-            nrows=number_of_points,
-            usecols=[
-                0,
-            ],
-            names=[
-                "psd",
-            ],
-        )
-        step_size = (end_point - start_point) / (len(data.index) - 1)
-        data.index *= step_size
+        data = data[["psd"]].reset_index(drop=True)
+        step_size = (settings["stop"] - settings["start"]) / (len(data.index) - 1)
+        data.index = settings["start"] + data.index * step_size
         data.index.name = "frequency"
 
-    if trace_unit == "dBm":
+    if settings["unit"] == "dBm":
         data.psd = 10 ** ((data.psd - 10) / 20) / np.sqrt(2)
 
     data.psd /= np.sqrt(rbw) * options.get("gain", 1)
     return data, {"type": "spectrum"}
 
 
-def parse_MSO9000_file(filename, options):
+def parse_MSO9000_file(filename, options, **kwargs):
     data = pd.read_csv(filename, delimiter=",", usecols=[0, 1], names=["date", "value"])
     data.value /= options.get("gain", 1)
 
@@ -362,9 +390,11 @@ def parse_MSO9000_file(filename, options):
     return data, {"sample_interval": sample_interval}
 
 
-def parse_3458A_SN18_file_1(filename, options=None):
-    data = pd.read_csv(
+def parse_3458A_SN18_file_1(filename, options=None, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 2],
@@ -376,13 +406,15 @@ def parse_3458A_SN18_file_1(filename, options=None):
     )
     sample_interval = (data.index[-1] - data.index[0]) / (len(data.index) - 1)
 
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
     return data, 0
 
 
-def parse_3458A_SN18_file_2(filename, options=None):
-    data = pd.read_csv(
+def parse_3458A_SN18_file_2(filename, options=None, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 3],
@@ -394,13 +426,15 @@ def parse_3458A_SN18_file_2(filename, options=None):
     )
     sample_interval = (data.index[-1] - data.index[0]) / (len(data.index) - 1)
 
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
     return data, 0
 
 
-def parse_3458A_SN18_file_3(filename, options=None):
-    data = pd.read_csv(
+def parse_3458A_SN18_file_3(filename, options=None, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 2, 4],
@@ -413,13 +447,16 @@ def parse_3458A_SN18_file_3(filename, options=None):
     )
     sample_interval = (data.index[-1] - data.index[0]) / (len(data.index) - 1)
 
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
     return data, 0
 
 
-def parse_3458A_SN18_file_4(filename, options=None):
-    data = pd.read_csv(
+def parse_3458A_SN18_file_4(filename, options=None, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
+        required=("date", options.get("sensor_id")),
         comment="#",
         header=None,
         usecols=[0, 1, 2, 3, 4, 5],
@@ -427,7 +464,7 @@ def parse_3458A_SN18_file_4(filename, options=None):
     )
     sample_interval = (data.index[-1] - data.index[0]) / (len(data.index) - 1)
 
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
     if options.get("sensor_id") is not None:
         data.rename(columns={options["sensor_id"]: "value"}, inplace=True)
@@ -435,18 +472,19 @@ def parse_3458A_SN18_file_4(filename, options=None):
     return data, 0
 
 
-def parse_3458A_SN18_file_5(filename, options):
-    data = pd.read_csv(
+def parse_3458A_SN18_file_5(filename, options, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
+        required=("date", "value"),
         comment="#",
         header=None,
         usecols=[0, 1, 3],
         names=["date", "value", "temp10k"],
     )
-    # data = data[data.value != -1.000000000E+38]
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    validity.mask_invalid(data)  # Mask the overflow readings of the 3458A
+    data["date"] = parse_dates(data["date"])  # It is faster to parse the dates *after* parsing the csv file
 
     gain = options.get("gain", 1)
     if gain != 1:
@@ -455,27 +493,27 @@ def parse_3458A_SN18_file_5(filename, options):
     return data, 0  # TODO Add sample interval
 
 
-def parse_mecom_file(filename, options=None):
-    data = pd.read_csv(
+def parse_mecom_file(filename, options=None, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 3],
         names=["date", "tec_sensor", "tec_current"],
     )
 
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
     #  data.set_index('date', inplace=True)
 
     return data, 0
 
 
-def parse_3458A_dgDrive_file(filename, options):
+def parse_3458A_dgDrive_file(filename, options, **kwargs):
     data = pd.read_csv(filename, comment="#", header=None, usecols=[0, 1], names=["date", "value"])
-    # data = data[data.value != -1.000000000E+38]
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    validity.mask_invalid(data)  # Mask the overflow readings of the 3458A
+    data["date"] = parse_dates(data["date"])  # It is faster to parse the dates *after* parsing the csv file
 
     gain = options.get("gain", 1)
     if gain != 1:
@@ -486,18 +524,18 @@ def parse_3458A_dgDrive_file(filename, options):
     return data, 0  # TODO Add sample interval
 
 
-def parse_3458A_5440B_file(filename, options):
-    data = pd.read_csv(
+def parse_3458A_5440B_file(filename, options, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 2, 3, 4],
         names=["date", "3458A", "dmm_temp", "DMM6500", "34470A"],
     )
-    # data = data[data.value != -1.000000000E+38]
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    validity.mask_invalid(data)  # Mask the overflow readings of the 3458A
+    data["date"] = parse_dates(data["date"])  # It is faster to parse the dates *after* parsing the csv file
 
     #  if options.get('sensor_id') is not None:
     #    data = data[['date',options['sensor_id']]]
@@ -506,18 +544,18 @@ def parse_3458A_5440B_file(filename, options):
     return data, 0  # TODO Add sample interval
 
 
-def parse_3458A_5440B_v2_file(filename, options):
-    data = pd.read_csv(
+def parse_3458A_5440B_v2_file(filename, options, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 2, 3],
         names=["date", "dmm_temp", "DMM6500", "34470A"],
     )
-    # data = data[data.value != -1.000000000E+38]
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    validity.mask_invalid(data)  # Mask the overflow readings of the 3458A
+    data["date"] = parse_dates(data["date"])  # It is faster to parse the dates *after* parsing the csv file
 
     #  if options.get('sensor_id') is not None:
     #    data = data[['date',options['sensor_id']]]
@@ -526,848 +564,300 @@ def parse_3458A_5440B_v2_file(filename, options):
     return data, 0  # TODO Add sample interval
 
 
-def parse_3458A_tempco_file(filename, options):
-    data = pd.read_csv(
+def convertResistanceToTemperature(values):
+    # Amphenol DC95 (Material Type 10kY)
+    return sensors.resistance_to_temperature(values, "DC95_10kY")
+
+
+def parse_LM399_logger_file(filename, options, **kwargs):
+    data = pd.read_csv(filename, comment="#", header=None, usecols=[0, 1], names=["date", "value"])
+    validity.mask_invalid(data, ["value"])  # Mask the overflow readings
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
+
+    data = scale_data(data, options, "column")
+
+    return data, 0
+
+
+def parse_LM399_logger_v2_file(filename, options, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
+        required=("date", "value"),
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3],
-        names=["date", "value", "ambient", "dmm"],
+        usecols=[0, 1, 2],
+        names=["date", "value", "tmp236"],
     )
-    # data = data[data.value != -1.000000000E+38]
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
-    # data.set_index('date', inplace=True)
-    #    sampling_interval = data['date'].diff().mean().total_seconds()
+    validity.mask_invalid(data, ["value"])  # Mask the overflow readings
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    gain_settings = options.get("gain", {})
-    for key in gain_settings:
-        if key in data and gain_settings[key] != 1:
-            data[key] /= gain_settings[key]
+    data = scale_data(data, options, "column")
 
     return data, 0
 
 
-def parse_3458A_tempco_v2_file(filename, options):
-    data = pd.read_csv(
+def parse_3478A_file(filename, options, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3, 4],
-        names=["date", "value", "dmm", "ambient", "humidity"],
+        usecols=[0, 1, 2],
+        names=["date", "HP3478A", "temp_dut"],
     )
-    # data = data[data.value != -1.000000000E+38]
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    if options.get("sensor_id") is not None:
-        data = data[["date", options["sensor_id"]]]
-        data.rename(columns={options["sensor_id"]: "value"}, inplace=True)
+    if options.get("convert_temperature", False) and "HP3478A" in data:
+        data.HP3478A = convertResistanceToTemperature(data.HP3478A)
 
-    gain = options.get("gain", 1)
-    if gain != 1:
-        data.value /= gain
+    data = scale_data(data, options, "column")
 
     return data, 0
 
 
-def convertResistanceToTemperature(values):
-    # Constants for Amphenol DC95 (Material Type 10kY)
-    a = 3.3540153 * 10**-3
-    b = 2.7867185 * 10**-4
-    c = 4.0006637 * 10**-6
-    d = 1.5575628 * 10**-7
-    rt25 = 10 * 10**3
+def parse_RTH1004_file(filename, options, **kwargs):
+    data = pd.read_csv(filename, delimiter=",", usecols=[0, 1], skiprows=22, names=["date", "value"])
+    data.value /= options.get("gain", 1)
 
-    return (
-        1 / (a + b * np.log(values / rt25) + c * np.log(values / rt25) ** 2 + d * np.log(values / rt25) ** 3) - 273.15
-    )
+    data = data.set_index("date")
+    sample_interval = (data.index[-1] - data.index[0]) / (len(data.index) - 1)
+    print("  RTH1004 sampling rate: {sampling_rate} Hz".format(sampling_rate=1 / sample_interval))
+    return data, {"sample_interval": sample_interval}
 
 
-def parse_3458A_tempco_v3_file(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5],
-        names=["date", "value", "dmm", "ambient", "humidity", "shunt"],
+def parse_waveforms(waveforms, options, columns=None):
+    """
+    Converts the requested channels of a binary scope capture. The options are
+      "channels": A dict mapping the channel names, e.g. "CH1", to column names. Defaults to all channels, a single
+        channel is called "value".
+      "gain": Divides all channels by this value.
+      "time_column": Adds a "time" column. It is also added, if the plot requests it.
+    The index is the sample number, the time is t0 + index * sample_interval.
+    """
+    channels = options.get("channels") or (
+        {name: "value" for name in waveforms} if len(waveforms) == 1 else {name: name for name in waveforms}
     )
-    data.shunt = convertResistanceToTemperature(data.shunt)
-    # data = data[data.value != -1.000000000E+38]
-    data["date"] = pd.to_datetime(
-        data["date"], utc=True
-    )  # It is faster to parse the dates *after* parsing the csv file
+    if columns is not None:
+        # Only convert the channels needed by the plot
+        channels = {channel: column for channel, column in channels.items() if column in columns}
+    data = pd.DataFrame(
+        {column: waveforms[channel].values(gain=options.get("gain", 1)) for channel, column in channels.items()},
+        copy=False,
+    )
+    first_waveform = next(iter(waveforms.values()))
+    if options.get("time_column") or (columns is not None and "time" in columns):
+        data["time"] = first_waveform.time()
 
-    if options.get("sensor_id") is not None:
-        data = data[["date", options["sensor_id"]]]
-        data.rename(columns={options["sensor_id"]: "value"}, inplace=True)
+    print(f"  Sampling rate: {1 / first_waveform.dt} Hz, {len(first_waveform)} samples, {len(waveforms)} channels")
+    return data, {"sample_interval": first_waveform.dt, "t0": first_waveform.t0}
 
-    gain = options.get("gain", 1)
-    if gain != 1:
-        data.value /= gain
 
-    return data, 0
+def parse_RTH1004_bin_file(filename, options, columns=None, **kwargs):
+    waveforms = scope_waveforms.read_rs_bin(filename, acquisition=options.get("acquisition", 0))
+    return parse_waveforms(waveforms, options, columns)
+
+
+def parse_MSO9000_bin_file(filename, options, columns=None, **kwargs):
+    if filename.lower().endswith(".h5"):
+        waveforms = scope_waveforms.read_keysight_h5(filename)
+    else:
+        waveforms = scope_waveforms.read_keysight_bin(filename)
+    return parse_waveforms(waveforms, options, columns)
+
+
+def parse_RTH1004_spectrum_file(filename, options, **kwargs):
+    # String looks like this:
+    # >>> print(repr(line))
+    # 'Resolution Bandwidth,4,Hz\n'
+    regex_rbw = re.compile(r"^RBW \[([A-Za-z]+)\],([0-9]*)\n$")
 
+    rbw = None
+    with open(filename) as lines:
+        for row_num, line in enumerate(lines):
+            if rbw is None and regex_rbw.match(line):
+                rbw = float(regex_rbw.match(line).group(2))
+                unit = regex_rbw.match(line).group(1)
+                print("  Resolution Bandwidth: {rbw} {unit}".format(rbw=rbw, unit=unit))
 
-def parse_3458A_tempco_v4_file(filename, options):
     data = pd.read_csv(
         filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6],
-        names=["date", "value", "dmm", "ambient", "humidity", "ambient2", "shunt"],
+        delimiter=",",
+        usecols=[0, 4],
+        skiprows=18,
+        names=["frequency", "psd"],
+        index_col=0,
     )
-    #  data.shunt = convertResistanceToTemperature(data.shunt)
-    # data = data[data.value != -1.000000000E+38]
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-    #  data.set_index('date', inplace=True)
+    data.psd /= np.sqrt(rbw) * options.get("gain", 1)
+    return data, {"type": "spectrum"}
 
-    if options.get("sensor_id") is not None:
-        data = data[["date", options["sensor_id"]]]
-        data.rename(columns={options["sensor_id"]: "value"}, inplace=True)
 
-    offset = options.get("offset", 0)
-    if offset != 0:
-        data.value += offset
+def parse_slice_qtc_file(filename, options, **kwargs):
+    data = pd.read_csv(filename, comment="#", header=None, usecols=[0, 1], names=["date", "slice_qtc"])
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    gain = options.get("gain", 1)
-    if gain != 1:
-        data.value /= gain
+    data = scale_data(data, options, "column")
 
     return data, 0
 
 
-def parse_3458A_tempco_v5_file(filename, options):
-    data = pd.read_csv(
+def parse_Keysight34470A_file_2(filename, options, delimiter=",", columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6, 7],
-        names=[
-            "date",
-            "value",
-            "HP3458A",
-            "dmm",
-            "ambient",
-            "humidity",
-            "ambient2",
-            "DMM6500",
-        ],
+        usecols=[0, 1, 2, 3],
+        names=["date", "34470A", "temp_100", "humidity"],
     )
-    data.DMM6500 = convertResistanceToTemperature(data.DMM6500)
-    #  data = data[data.value != -1.000000000E+38]
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-    #  data.set_index('date', inplace=True)
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    #  offset =  options.get('offset', 0)
-    #  if offset != 0:
-    #    data.value += offset
+    data = scale_data(data, options, "column")
+
+    return data[1:], 0
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
 
-    #  gain_settings =  options.get('gain', {})
-    #  for key in gain_settings:
-    #    if key in data and gain_settings[key] != 1:
-    #      data[key] /= gain_settings[key]
+def parse_labtemp_drift_file(filename, options, delimiter=",", columns=None, date_range=None, **kwargs):
+    data = read_csv(
+        filename,
+        columns=columns,
+        date_range=date_range,
+        comment="#",
+        header=None,
+        usecols=[0, 1, 2, 3, 4],
+        names=["date", "temp_10k", "temp_100", "humidity_lab", "temp_ee07"],
+    )
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    #  data.value = 1 / data.value * 7.5
-    #  data.HP3458A = 1 / data.HP3458A * 7.5
+    data = scale_data(data, options, "column")
 
     return data, 0
 
 
-def parse_3458A_tempco_v6_file(filename, options):
-    data = pd.read_csv(
+def parse_rth_digital_file(filename, options, delimiter=",", columns=None, date_range=None, **kwargs):
+    # The logic channels are packed into the bits of the uint8 column "digital", D0 being bit 0. All channels are
+    # always read, because the packed column contains all of them.
+    channels = ["D7", "D6", "D5", "D4", "D3", "D2", "D1", "D0"]
+    raw_data = read_csv(
         filename,
+        date_range=date_range,
+        skiprows=22,
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3, 4, 5],
-        names=["date", "HP3458A", "dmm", "ambient", "humidity", "ambient2"],
+        usecols=[0, 1, 2, 3, 4, 5, 6, 7, 8],
+        names=["date"] + channels,
+        dtype={channel: np.uint8 for channel in channels},
     )
-    #  data = data[data.value != -1.000000000E+38]
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    # data.date = pd.to_datetime(data.date, utc=True)   # It is faster to parse the dates *after* parsing the csv file
+    data = pd.DataFrame({"date": raw_data.date, "digital": logic_analysis.pack(raw_data)}, index=raw_data.index)
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
+    # Only unpack the channels used by the plot or the scaling functions. Without a plot, all channels are returned.
+    scaling = options.get("scaling", {})
+    for channel in logic_analysis.CHANNELS:
+        if columns is None or channel in columns or channel in scaling:
+            data[channel] = logic_analysis.unpack(data.digital.to_numpy(), channel)
+
+    data = scale_data(data, options, "column")
 
     return data, 0
 
 
-def parse_3458A_tempco_v7_file(filename, options):
-    data = pd.read_csv(
+def parse_SCAN2000_file(filename, options, delimiter=",", columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6],
-        names=["date", "HP3458A", "ambient", "dmm", "humidity", "ambient2", "DMM6500"],
-        na_values="None",
+        usecols=range(19),
+        names=[
+            "date",
+        ]
+        + [f"K2002 CH{channel+1}" for channel in range(10)]
+        + [
+            "temp_10k",
+            "temp_100",
+            "humidity",
+            "temp_chamber",
+            "temp_tec",
+            "current_tec",
+            "voltage_tec",
+            "setpoint_tec",
+        ],
     )
-    #  data = data[data.value != -1.000000000E+38]
-    data.DMM6500 = convertResistanceToTemperature(data.DMM6500)
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
+    data = scale_data(data, options, "column")
 
     return data, 0
 
 
-def parse_3458A_tempco_v8_file(filename, options):
-    data = pd.read_csv(
+def parse_WS8_file(filename, options, delimiter=",", columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
+        skiprows=1,
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3, 4],
-        names=["date", "HP3458A", "temp_dmm", "temp_dut", "DMM6500"],
-        na_values="None",
+        usecols=[
+            0,
+            3,
+            4,
+            5,
+            6,
+        ],
+        names=["date", "ch1", "ch2", "pressure", "temp"],
     )
-    #  data = data[data.value != -1.000000000E+38]
-    # data.DMM6500 = convertResistanceToTemperature(data.DMM6500)
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
+    # Convert to Hz
+    for key in ("ch1", "ch2"):
         if key in data:
-            data[key] = scaling_function(data[key])
+            data[key] *= 10**12
+    # data.ch3 *= 10**12
+    if "pressure" in data:
+        data.pressure *= 100  # Convert to Pa
+
+    data = scale_data(data, options, "column")
 
     return data, 0
 
 
-def parse_3458A_tempco_v9_file(filename, options):
-    data = pd.read_csv(
+def parse_data_logger_fluke5440b(filename, options, delimiter=",", columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6],
-        names=[
-            "date",
-            "HP3458A",
-            "temp_dmm",
-            "temp_dut",
-            "humidity",
-            "temp_ambient",
-            "DMM6500",
-        ],
-        na_values="None",
+        usecols=[0, 1, 2, 3, 4, 6],
+        names=["date", "k2002", "3458a", "34470a", "dmm6500", "temperature"],
     )
-    #  data = data[data.value != -1.000000000E+38]
-    # data.DMM6500 = convertResistanceToTemperature(data.DMM6500)
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
+    data = scale_data(data, options, existing_only=True)
 
     return data, 0
 
 
-def parse_3458A_tempco_v11_file(filename, options):
+def parse_data_logger_short_dmm(filename, options, delimiter=",", **kwargs):
     data = pd.read_csv(
         filename,
         comment="#",
         header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
-        names=[
-            "date",
-            "HP3458A",
-            "temp_dmm",
-            "temp_dut",
-            "humidity",
-            "temp_ambient",
-            "DMM6500",
-            "tec_sensor",
-            "tec_current",
-            "tec_voltage",
-            "setpoint",
+        usecols=[
+            0,
+            1,
         ],
-        na_values="None",
+        names=["date", options.get("label", "dmm")],
     )
-    #  data = data[data.value != -1.000000000E+38]
-    # data.DMM6500 = convertResistanceToTemperature(data.DMM6500)
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date, date_format="ISO8601")
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_3458A_tempco_v12_file(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11],
-        names=[
-            "date",
-            "HP3458A",
-            "temp_dmm",
-            "temp_dut",
-            "humidity_dut",
-            "temp_ambient",
-            "DMM6500",
-            "K2002",
-            "tec_sensor",
-            "tec_current",
-            "tec_voltage",
-            "setpoint",
-        ],
-        na_values="None",
-    )
-    #  data = data[data.value != -1.000000000E+38]
-    # data.DMM6500 = convertResistanceToTemperature(data.DMM6500)
-    data = data[2:]  # The first 2 values of the HP3458A are a few ppm out
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_3458A_tempco_v13_file(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
-        names=[
-            "date",
-            "HP3458A",
-            "temp_dmm",
-            "temp_dut",
-            "humidity_ambient",
-            "humidity_dut",
-            "temp_ambient",
-            "DMM6500",
-            "K2002",
-            "tec_sensor",
-            "tec_current",
-            "tec_voltage",
-            "setpoint",
-        ],
-        na_values="None",
-    )
-    #  data = data[data.value != -1.000000000E+38]
-    # data.DMM6500 = convertResistanceToTemperature(data.DMM6500)
-    data = data[2:]  # The first 2 values of the HP3458A are a few ppm out
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_LM399_logger_file(filename, options):
-    data = pd.read_csv(filename, comment="#", header=None, usecols=[0, 1], names=["date", "value"])
-    data = data[data.value > -9.90000000e37]  # Drop out out bounds
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    remove_beyond_sigma = options.get("remove_outliers", {}).get("sigma")
-    if remove_beyond_sigma is not None:
-        sigma = data.value.std()
-        print(
-            "    Removing outliers beyond {sigma_count}σ (σ = {sigma})".format(
-                sigma_count=remove_beyond_sigma, sigma=sigma
-            )
-        )
-        data = data[np.abs(data.value - data.value.mean()) <= (remove_beyond_sigma * sigma)]
-        print("    Std. deviation after removing outliers σ = {sigma}".format(sigma=data.value.std()))
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_LM399_logger_v2_file(filename, options, **kwargs):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2],
-        names=["date", "value", "tmp236"],
-    )
-    data = data[abs(data.value) < 9.90000000e37]  # Drop out out bounds
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    #  data = calculate_plc100(data)
-
-    remove_beyond_sigma = options.get("remove_outliers", {}).get("sigma")
-    if remove_beyond_sigma is not None:
-        sigma = data.value.std()
-        print(
-            "    Removing outliers beyond {sigma_count}σ (σ = {sigma})".format(
-                sigma_count=remove_beyond_sigma, sigma=sigma
-            )
-        )
-        data = data[np.abs(data.value - data.value.mean()) <= (remove_beyond_sigma * sigma)]
-        print("    Std. deviation after removing outliers σ = {sigma}".format(sigma=data.value.std()))
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_LTZ1000_logger_file(filename, options):
-    data = pd.read_csv(filename, comment="#", header=None, usecols=[0, 1], names=["date", "HP3458A"])
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_LTZ1000_logger_v2_file(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4],
-        names=["date", "HP3458A", "ambient", "dmm", "humidity"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_LTZ1000_logger_v3_file(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11],
-        names=[
-            "date",
-            "HP3458A",
-            "temp_10k",
-            "temp_100",
-            "humidity_lab",
-            "humidity_dut",
-            "temp_ee07",
-            "K2002",
-            "tec_sensor",
-            "tec_current",
-            "tec_voltage",
-            "setpoint",
-        ],
-        dtype={"HP3458A": "float"},
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_3478A_file(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2],
-        names=["date", "HP3478A", "temp_dut"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    if options.get("convert_temperature", False):
-        data.HP3478A = convertResistanceToTemperature(data.HP3478A)
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_RTH1004_file(filename, options):
-    data = pd.read_csv(filename, delimiter=",", usecols=[0, 1], skiprows=22, names=["date", "value"])
-    data.value /= options.get("gain", 1)
-
-    data = data.set_index("date")
-    sample_interval = (data.index[-1] - data.index[0]) / (len(data.index) - 1)
-    print("  RTH1004 sampling rate: {sampling_rate} Hz".format(sampling_rate=1 / sample_interval))
-    return data, {"sample_interval": sample_interval}
-
-
-def parse_RTH1004_spectrum_file(filename, options):
-    # String looks like this:
-    # >>> print(repr(line))
-    # 'Resolution Bandwidth,4,Hz\n'
-    regex_rbw = re.compile(r"^RBW \[([A-Za-z]+)\],([0-9]*)\n$")
-
-    rbw = None
-    with open(filename) as lines:
-        for row_num, line in enumerate(lines):
-            if rbw is None and regex_rbw.match(line):
-                rbw = float(regex_rbw.match(line).group(2))
-                unit = regex_rbw.match(line).group(1)
-                print("  Resolution Bandwidth: {rbw} {unit}".format(rbw=rbw, unit=unit))
-
-    data = pd.read_csv(
-        filename,
-        delimiter=",",
-        usecols=[0, 4],
-        skiprows=18,
-        names=["frequency", "psd"],
-        index_col=0,
-    )
-    data.psd /= np.sqrt(rbw) * options.get("gain", 1)
-    return data, {"type": "spectrum"}
-
-
-def parse_Fluke5440B_test_file(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6],
-        names=[
-            "date",
-            "HP3458A",
-            "temp_dmm",
-            "temp_dut",
-            "humidity",
-            "temp_ambient",
-            "K2002",
-        ],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_slice_qtc_file(filename, options):
-    data = pd.read_csv(filename, comment="#", header=None, usecols=[0, 1], names=["date", "slice_qtc"])
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_Fluke5440B_test_file_v2(filename, options):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5],
-        names=["date", "HP3458A", "temp_10k", "temp_100", "humidity_lab", "K2002"],
-        dtype={"HP3458A": "float"},
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_Keysight34470A_file_2(filename, options, delimiter=","):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3],
-        names=["date", "34470A", "temp_100", "humidity"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data[1:], 0
-
-
-def parse_labtemp_drift_file(filename, options, delimiter=","):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4],
-        names=["date", "temp_10k", "temp_100", "humidity_lab", "temp_ee07"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_rth_digital_file(filename, options, delimiter=","):
-    data = pd.read_csv(
-        filename,
-        skiprows=22,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 5, 6, 7, 8],
-        names=["date", "D7", "D6", "D5", "D4", "D3", "D2", "D1", "D0"],
-    )
-    # data.date = pd.to_datetime(data.date, utc=True)   # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_SCAN2000_file(filename, options, delimiter=",", **_kwargs):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=range(19),
-        names=[
-            "date",
-        ]
-        + [f"K2002 CH{channel+1}" for channel in range(10)]
-        + [
-            "temp_10k",
-            "temp_100",
-            "humidity",
-            "temp_chamber",
-            "temp_tec",
-            "current_tec",
-            "voltage_tec",
-            "setpoint_tec",
-        ],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_WS8_file(filename, options, delimiter=","):
-    data = pd.read_csv(
-        filename,
-        skiprows=1,
-        comment="#",
-        header=None,
-        usecols=[
-            0,
-            3,
-            4,
-            5,
-            6,
-        ],
-        names=["date", "ch1", "ch2", "pressure", "temp"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-    # Convert to Hz
-    data.ch1 *= 10**12
-    data.ch2 *= 10**12
-    # data.ch3 *= 10**12
-    data.pressure *= 100  # Convert to Pa
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data[key])
-
-    return data, 0
-
-
-def parse_timescale_db_file(filename, options, delimiter=","):
-    data = pd.read_csv(
-        filename,
-        skiprows=1,
-        comment="#",
-        header=None,
-        usecols=range(7),
-        names=[
-            "date",
-            "humidity_dut",
-            "temp_table",
-            "laser_power",
-            "air_pressure",
-            "frequency",
-            "piezo_voltage",
-        ],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_timescale_db_015_file(filename, options, delimiter=","):
-    data = pd.read_csv(
-        filename,
-        skiprows=1,
-        comment="#",
-        header=None,
-        usecols=range(6),
-        names=[
-            "date",
-            "humidity_dut",
-            "temp_table",
-            "air_pressure",
-            "diode_voltage",
-            "piezo_voltage",
-        ],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_timescale_db_file_v2(filename, options, delimiter=",", **kwargs):
-    data = pd.read_csv(
-        filename,
-        skiprows=1,
-        comment="#",
-        header=None,
-        usecols=range(3),
-        names=[
-            "date",
-            "output",
-            "temperature",
-        ],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_timescale_db_file_v3(filename, options, delimiter=",", **kwargs):
-    data = pd.read_csv(
-        filename,
-        skiprows=1,
-        comment="#",
-        header=None,
-        usecols=range(4),
-        names=["date", "output", "temperature_room", "temperature_labnode"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_timescale_db_file_v4(filename, options, delimiter=",", **kwargs):
-    data = pd.read_csv(
-        filename,
-        skiprows=1,
-        comment="#",
-        header=None,
-        usecols=range(len(options["labels"]) + 1),
-        names=[
-            "date",
-        ]
-        + options["labels"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_timescale_db_fluke5440b(filename, options, delimiter=",", **kwargs):
-    data = pd.read_csv(
-        filename,
-        skiprows=1,
-        comment="#",
-        header=None,
-        usecols=range(6),
-        names=["date", "34470a", "3458a", "k2002", "dmm6500", "temperature"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_data_logger_fluke5440b(filename, options, delimiter=",", **kwargs):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[0, 1, 2, 3, 4, 6],
-        names=["date", "k2002", "3458a", "34470a", "dmm6500", "temperature"],
-    )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
-
-    return data, 0
-
-
-def parse_data_logger_short_dmm(filename, options, delimiter=",", **kwargs):
-    data = pd.read_csv(
-        filename,
-        comment="#",
-        header=None,
-        usecols=[
-            0,
-            1,
-        ],
-        names=["date", options.get("label", "dmm")],
-    )
-    data.date = pd.to_datetime(
-        data.date,
-        utc=True,
-        format="ISO8601",
-    )  # It is faster to parse the dates *after* parsing the csv file
-
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
+    data = scale_data(data, options, existing_only=True)
 
     return data, 0
 
@@ -1391,9 +881,7 @@ def parse_data_logger_short_dmm_frank(filename, options, delimiter=",", **kwargs
         data.date, unit="s"
     )  # It is faster to parse the dates *after* parsing the csv file
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        if key in data:
-            data[key] = scaling_function(data)
+    data = scale_data(data, options, existing_only=True)
 
     return data, 0
 
@@ -1428,25 +916,29 @@ def noise_gen(filename, options, **kwargs):
     return df, 0
 
 
-def parse_data_dgdrive_powermeter(filename, options, delimiter=",", **kwargs):
-    data = pd.read_csv(
+def parse_data_dgdrive_powermeter(filename, options, delimiter=",", columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
         comment="#",
         header=None,
         usecols=[0, 1, 2, 3],
         names=["date", "dgdrive", "pm400", "34470a"],
     )
-    data.date = pd.to_datetime(data.date, utc=True)  # It is faster to parse the dates *after* parsing the csv file
+    data.date = parse_dates(data.date)  # It is faster to parse the dates *after* parsing the csv file
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        data[key] = scaling_function(data)
+    data = scale_data(data, options)
 
     return data, 0
 
 
-def parse_data_ltspice_fets(filename, options, **kwargs):
-    data = pd.read_csv(
+def parse_data_ltspice_fets(filename, options, columns=None, date_range=None, **kwargs):
+    data = read_csv(
         filename,
+        columns=columns,
+        date_range=date_range,
+        required=(),
         comment="#",
         header=None,
         skiprows=options.get("skiprows", 1),
@@ -1455,81 +947,106 @@ def parse_data_ltspice_fets(filename, options, **kwargs):
         names=options["columns"].values(),
     )
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        data[key] = scaling_function(data)
+    data = scale_data(data, options)
 
     return data, 0
 
 
-def parse_bode100_file(filename, options, **kwargs):
-    selected_trace = options.get("trace", 0)
-
-    def read_file(lines):
-        start = None
-        stop = None
-        current_trace = 0
+def _interpolate(x_value, axis, value):
+    # np.interp() does not support the complex values of an AC analysis
+    if np.iscomplexobj(value):
+        return np.interp(x_value, axis, value.real) + 1j * np.interp(x_value, axis, value.imag)
+    return np.interp(x_value, axis, value)
 
-        for row_num, line in enumerate(lines):
-            if start is None and line == "------\n":
-                start = row_num + 2  # Skip this row + header
-            if start is not None and line == "\n":
-                if current_trace == selected_trace:
-                    stop = row_num
-                    break
-                else:
-                    start = row_num + 2  # Skip this row + header
-                    current_trace += 1
-        if start is None or stop is None or selected_trace != current_trace:
-            raise Exception(f"Invalid data file or incorrect trace selected: {filename}")
-
-        return start, stop
-
-    _, ext = os.path.splitext(filename)
-    if ext == ".zip":
-        with zipfile.ZipFile(filename) as zip_file:
-            if len(zip_file.namelist()) == 1:
-                with zip_file.open(zip_file.namelist()[0]) as lines:
-                    # The zip file is byte encoded, convert to utf-8 first
-                    starting_row, final_row = read_file(io.TextIOWrapper(lines, "utf-8"))
-    else:
-        with open(filename) as lines:
-            starting_row, final_row = read_file(lines)
 
+def parse_ltspice_raw(filename, options, columns=None, **kwargs):
+    """
+    Reads the variables of a binary LTspice .raw file. The options are
+      "columns": A dict mapping the LTspice variable names, e.g. "V(out)", to column names. Defaults to all variables.
+      "steps": A list of the .step runs to read, starting at 0. Defaults to all steps.
+      "x-value": If set, each variable is interpolated at this time or frequency, returning one row per step. This is
+        useful for the histograms of Monte Carlo runs.
+    AC analyses return complex columns. A "step" column is added for stepped simulations.
+    """
+    raw = ltspice_raw.RawFile(filename)
+    variables = options.get("columns") or {name: name for name in raw.variables}
+    if columns is not None:
+        # Only read the variables needed by the plot
+        variables = {variable: column for variable, column in variables.items() if column in columns}
+    steps = options.get("steps", range(len(raw.steps)))
+    print(f"  {raw.plotname}: {len(raw.variables)} variables, {len(raw.steps)} steps")
+
+    x_value = options.get("x-value")
+    frames = []
+    for step in steps:
+        values = {column: raw.get(variable, step) for variable, column in variables.items()}
+        if x_value is not None:
+            axis = raw.get(raw.axis_name, step)
+            values = {column: [_interpolate(x_value, axis, value)] for column, value in values.items()}
+        frame = pd.DataFrame(values, copy=False)
+        if len(raw.steps) > 1:
+            frame["step"] = step
+        frames.append(frame)
+    data = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    data = scale_data(data, options)
 
-    data = pd.read_csv(
-        filename,
-        skiprows=starting_row,
-        nrows=final_row - starting_row,
-        delimiter=",",
-        usecols=options["columns"].keys(),
-        names=options["columns"].values(),
-    )
+    return data, 0
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        data[key] = scaling_function(data)
 
-    return data, 0
+# The data of a Bode 100 export starts after the settings with a line of dashes. Each trace is a block of a header and
+# the values, the blocks are separated by empty lines.
+BODE100_DATA_REGEX = re.compile(rb"^------\r?$", re.MULTILINE)
+BODE100_BLOCK_SEPARATOR_REGEX = re.compile(rb"\r?\n[ \t]*(?:\r?\n|$)")
 
 
-# taken from: https://gist.github.com/endolith/255291
-def freq_from_fft(sig, fs):
+def read_bode100_traces(filename):
     """
-    Estimate frequency from peak of FFT
+    Returns all traces of a Bode 100 export in a single pass over the decompressed file. The rows are indexed by trace
+    number, starting at 0, and row, the columns by their position within the trace. The dtypes of the columns of each
+    trace are stored in data.attrs, because traces with fewer columns are padded with NaN.
     """
-    # Compute Fourier transform of windowed signal
-    windowed = sig * signal.windows.blackmanharris(len(sig))
-    f = np.fft.rfft(windowed)
-    f[0:2]=0
+    buffer = csv_reader.read_bytes(filename)
+    match = BODE100_DATA_REGEX.search(buffer)
+    if match is None:
+        raise Exception(f"Invalid data file: {filename}")
+
+    blocks = []
+    start = buffer.find(b"\n", match.end()) + 1
+    for separator in BODE100_BLOCK_SEPARATOR_REGEX.finditer(buffer, start):
+        if separator.start() > start:
+            blocks.append(buffer[start : separator.start()])
+        start = separator.end()
+    if buffer[start:].strip():
+        blocks.append(buffer[start:])
+
+    # Decode the values straight from the buffer, skipping the header of each block
+    traces = {
+        trace: pd.read_csv(io.BytesIO(block), delimiter=",", header=None, skiprows=1)
+        for trace, block in enumerate(blocks)
+    }
+    data = pd.concat(traces, names=["trace", "row"]) if traces else pd.DataFrame()
+    data.attrs["dtypes"] = {trace: trace_data.dtypes.to_dict() for trace, trace_data in traces.items()}
+    return data
+
 
-    # Find the peak and interpolate to get a more accurate peak
-    i = np.argmax(abs(f))  # Just use this for less-accurate, naive version
-    #true_i = parabolic(log(abs(f)), i)[0]
+def parse_bode100_file(filename, options, **kwargs):
+    selected_trace = options.get("trace", 0)
 
-    # Convert to equivalent frequency
-    return fs * i / len(windowed)
+    traces = frame_memo.memoized_read(read_bode100_traces, filename)
+    if selected_trace not in traces.attrs["dtypes"]:
+        raise Exception(f"Invalid data file or incorrect trace selected: {filename}")
+    dtypes = traces.attrs["dtypes"][selected_trace]
+    data = traces.loc[selected_trace, list(dtypes)].astype(dtypes).reset_index(drop=True)
+    data.attrs = {}  # The dtypes of the traces cannot be serialized by the cache
+    data = data[list(options["columns"].keys())].set_axis(list(options["columns"].values()), axis="columns")
 
+    data = scale_data(data, options)
 
-def parse_output_impedance_generic(filename, options, **kwargs):
+    return data, 0
+
+
+def read_impedance_capture(filename, options):
     data = pd.read_csv(
         filename,
         comment="#",
@@ -1540,39 +1057,364 @@ def parse_output_impedance_generic(filename, options, **kwargs):
         names=options["columns"].values(),
     )
 
-    for key, scaling_function in options.get("scaling", {}).items():
-        data[key] = scaling_function(data)
+    data = scale_data(data, options)
 
     sample_interval = (data[options["x-axis"]].iloc[-1] - data[options["x-axis"]].iloc[0]) / (data[options["x-axis"]].size - 1)
-    modulation_frequency = options['frequency'] if options.get('frequency') is not None else freq_from_fft(
-        data['modulation_amplitude'], fs=1 / sample_interval)
+    return data, sample_interval
+
+
+def parse_output_impedance_generic(filename, options, **kwargs):
+    data, sample_interval = read_impedance_capture(filename, options)
+    modulation_frequency = (
+        options["frequency"]
+        if options.get("frequency") is not None
+        else frequency_estimation.estimate_frequency(data["modulation_amplitude"], sample_rate=1 / sample_interval)
+    )
     print(f"  Modulation frequency: {modulation_frequency:.2e} Hz")
 
-    model = lmfit.models.ExpressionModel(
-        "ampl * sin({omega} * x + phi) + offset".format(omega=modulation_frequency * 2 * np.pi))
+    # Fit both channels at once. The model is linear, once the frequency is known.
+    fit = lock_in.fit_sine(
+        data["time"], data[["modulation_amplitude", "output_current"]].to_numpy(), modulation_frequency
+    )
+    modulation_amplitude, error_amplitude = fit["amplitude"]  # in V
+    modulation_stderr, error_stderr = fit["amplitude_stderr"]
+    print(f"    Modulation amplitude: {modulation_amplitude * 2:.2e} ± {modulation_stderr * 2:.1e} Vpp")
+    current_modulation = error_amplitude / options["gain"] / options["sense_resistor"]  # in A
+    print(f"    Error amplitude: {error_amplitude * 2:.2e} ± {error_stderr * 2:.1e} App")
+    impedance = modulation_amplitude / current_modulation
+    impedance_stderr = impedance * np.hypot(modulation_stderr / modulation_amplitude, error_stderr / error_amplitude)
+    print(f"    Output Impedance: {impedance:.2e} ± {impedance_stderr:.1e} Ω")
+
+    return modulation_frequency, impedance - options["sense_resistor"]
 
-    params = model.make_params(ampl=0.1, phi=0, offset=0.5)
-    fit = model.fit(data['modulation_amplitude'], params, x=data['time'])
-    modulation_amplitude = fit.best_values['ampl']  # in V
-    fit = model.fit(data['output_current'], params, x=data['time'])
-    print(f"    Modulation amplitude: {abs(modulation_amplitude * 2):.2e} Vpp")
-    current_modulation = fit.best_values['ampl'] / options["gain"] / options["sense_resistor"]  # in A
-    print(f"    Error amplitude: {abs(fit.best_values['ampl'] * 2):.2e} App")
-    print(f"    Output Impedance: {abs(modulation_amplitude / current_modulation):.2e} Ω")
 
-    return modulation_frequency, abs(modulation_amplitude / current_modulation) - options["sense_resistor"]
+def parse_output_impedance_multisine(filename, options, **kwargs):
+    """
+    Extracts the complex output impedance at all frequencies of a capture excited by a multisine or a chirp. Additional
+    options:
+      "excitation": "multisine" (default) or "chirp"
+      "frequencies": The excited frequencies of a multisine. By default, all tones within "threshold" dB of the
+        strongest tone of the modulation are used.
+      "threshold": Excitation threshold in dB relative to the strongest tone or bin. Defaults to -20 dB.
+      "output_columns": The names of the frequency, impedance magnitude and impedance phase (in degrees) columns.
+    """
+    data, sample_interval = read_impedance_capture(filename, options)
+    threshold = options.get("threshold", -20)
+    current = data["output_current"] / options["gain"] / options["sense_resistor"]  # in A
+
+    if options.get("excitation", "multisine") == "chirp":
+        # A chirp excites every bin of its band. Use the ratio of the spectra of all bins above the threshold. There is
+        # no window, because it would suppress the beginning and the end of the sweep.
+        voltage_spectrum = np.fft.rfft(data["modulation_amplitude"] - data["modulation_amplitude"].mean())
+        current_spectrum = np.fft.rfft(current - current.mean())
+        magnitude = np.abs(voltage_spectrum)
+        magnitude[:2] = 0  # Skip the residual DC offset
+        excited = magnitude >= magnitude.max() * 10 ** (threshold / 20)
+        frequencies = np.fft.rfftfreq(len(data), d=sample_interval)[excited]
+        impedance = voltage_spectrum[excited] / current_spectrum[excited]
+        print(f"  Chirp: {len(frequencies)} bins from {frequencies.min():.2e} Hz to {frequencies.max():.2e} Hz")
+    else:
+        frequencies = options.get("frequencies")
+        if frequencies is None:
+            frequencies = frequency_estimation.find_tones(
+                data["modulation_amplitude"], sample_rate=1 / sample_interval, threshold=threshold
+            )
+        frequencies = np.sort(np.asarray(frequencies, dtype=np.float64))
+        print(f"  Multisine: {len(frequencies)} tones from {frequencies.min():.2e} Hz to {frequencies.max():.2e} Hz")
+        # Fit all tones of both channels at once
+        fit = lock_in.fit_sines(data["time"], np.column_stack((data["modulation_amplitude"], current)), frequencies)
+        voltage, current_modulation = (fit["amplitude"] * np.exp(1j * fit["phase"])).T
+        impedance = voltage / current_modulation
+
+    impedance = impedance - options["sense_resistor"]
+    frequency_column, impedance_column, phase_column = options.get(
+        "output_columns", ("frequency", "impedance", "phase")
+    )
+    return (
+        pd.DataFrame(
+            {
+                frequency_column: frequencies,
+                impedance_column: np.abs(impedance),
+                phase_column: np.degrees(np.angle(impedance)),
+            }
+        ),
+        0,
+    )
+
 
 def concat_series(filename, options, **_kwargs):
     print(f"  Concatenating {len(options['files'])} files")
+    # The results of each file are cached by parse_file(), so only new or modified files are parsed again
+    files = [file for file in options["files"] if file.get("show", True)]
     return (
         pd.DataFrame(
-            [parse_file(**file) for file in options["files"] if file.get("show", True)],
+            map_ordered(lambda file: parse_file(**file), files, jobs=csv_reader.PARALLEL_JOBS),
             columns=options["columns"].values()
         ),
         0
     )
 
 
+def select_sensor(data, options):
+    if options.get("sensor_id") is not None:
+        data = data[["date", options["sensor_id"]]]
+        data = data.rename(columns={options["sensor_id"]: "value"})
+    return data
+
+
+def apply_offset(data, options):
+    offset = options.get("offset", 0)
+    if offset != 0:
+        data.value += offset
+    return data
+
+
+def apply_gain(data, options):
+    gain = options.get("gain", 1)
+    if gain != 1:
+        data.value /= gain
+    return data
+
+
+def apply_gain_settings(data, options):
+    # The gain is set per column
+    gain_settings = options.get("gain", {})
+    for key in gain_settings:
+        if key in data and gain_settings[key] != 1:
+            data[key] /= gain_settings[key]
+    return data
+
+
+# The layout of the csv logs written by our data loggers. All of them contain a date column followed by the
+# measurements. Each schema may define:
+#   columns: The column names in the order of the file or a function of the options returning them
+#   dtype: The dtype of the measurement columns, defaults to float64
+#   required: The columns read even if the plot does not need them
+#   skiprows: The number of header lines
+#   date_format: The format of the date column, inferred if not given
+#   conversions: Functions applied to a column, e.g. to convert a resistance to a temperature
+#   drop_rows: The number of rows to drop at the beginning
+#   post: Functions of (data, options) applied after the conversions
+#   scaling: Whether the scaling functions are applied to the "column" or the whole "frame"
+CSV_SCHEMAS = {
+    "3458A_Tempco": {
+        "columns": ["date", "value", "ambient", "dmm"],
+        "post": [apply_gain_settings],
+        "scaling": None,
+    },
+    "3458A_Tempco_v2": {
+        "columns": ["date", "value", "dmm", "ambient", "humidity"],
+        "required": ("date", "value", "sensor_id"),
+        "post": [select_sensor, apply_gain],
+        "scaling": None,
+    },
+    "3458A_Tempco_v3": {
+        "columns": ["date", "value", "dmm", "ambient", "humidity", "shunt"],
+        "required": ("date", "value", "sensor_id"),
+        "conversions": {"shunt": convertResistanceToTemperature},
+        "post": [select_sensor, apply_gain],
+        "scaling": None,
+    },
+    "3458A_Tempco_v4": {
+        "columns": ["date", "value", "dmm", "ambient", "humidity", "ambient2", "shunt"],
+        "required": ("date", "value", "sensor_id"),
+        "post": [select_sensor, apply_offset, apply_gain],
+        "scaling": None,
+    },
+    "3458A_Tempco_v5": {
+        "columns": ["date", "value", "HP3458A", "dmm", "ambient", "humidity", "ambient2", "DMM6500"],
+        "conversions": {"DMM6500": convertResistanceToTemperature},
+    },
+    "3458A_Tempco_v6": {
+        "columns": ["date", "HP3458A", "dmm", "ambient", "humidity", "ambient2"],
+    },
+    "3458A_Tempco_v7": {
+        "columns": ["date", "HP3458A", "ambient", "dmm", "humidity", "ambient2", "DMM6500"],
+        "conversions": {"DMM6500": convertResistanceToTemperature},
+    },
+    "3458A_Tempco_v8": {
+        "columns": ["date", "HP3458A", "temp_dmm", "temp_dut", "DMM6500"],
+    },
+    "3458A_Tempco_v9": {
+        "columns": ["date", "HP3458A", "temp_dmm", "temp_dut", "humidity", "temp_ambient", "DMM6500"],
+    },
+    "3458A_Tempco_v11": {
+        "columns": [
+            "date",
+            "HP3458A",
+            "temp_dmm",
+            "temp_dut",
+            "humidity",
+            "temp_ambient",
+            "DMM6500",
+            "tec_sensor",
+            "tec_current",
+            "tec_voltage",
+            "setpoint",
+        ],
+    },
+    "3458A_Tempco_v12": {
+        "columns": [
+            "date",
+            "HP3458A",
+            "temp_dmm",
+            "temp_dut",
+            "humidity_dut",
+            "temp_ambient",
+            "DMM6500",
+            "K2002",
+            "tec_sensor",
+            "tec_current",
+            "tec_voltage",
+            "setpoint",
+        ],
+        "drop_rows": 2,  # The first 2 values of the HP3458A are a few ppm out
+    },
+    "3458A_Tempco_v13": {
+        "columns": [
+            "date",
+            "HP3458A",
+            "temp_dmm",
+            "temp_dut",
+            "humidity_ambient",
+            "humidity_dut",
+            "temp_ambient",
+            "DMM6500",
+            "K2002",
+            "tec_sensor",
+            "tec_current",
+            "tec_voltage",
+            "setpoint",
+        ],
+        "drop_rows": 2,  # The first 2 values of the HP3458A are a few ppm out
+    },
+    "LTZ1000_logger": {
+        "columns": ["date", "HP3458A"],
+    },
+    "LTZ1000_logger_v2": {
+        "columns": ["date", "HP3458A", "ambient", "dmm", "humidity"],
+    },
+    "LTZ1000_logger_v3": {
+        "columns": [
+            "date",
+            "HP3458A",
+            "temp_10k",
+            "temp_100",
+            "humidity_lab",
+            "humidity_dut",
+            "temp_ee07",
+            "K2002",
+            "tec_sensor",
+            "tec_current",
+            "tec_voltage",
+            "setpoint",
+        ],
+    },
+    "Fluke5440B_test": {
+        "columns": ["date", "HP3458A", "temp_dmm", "temp_dut", "humidity", "temp_ambient", "K2002"],
+    },
+    "Fluke5440B_test_v2": {
+        "columns": ["date", "HP3458A", "temp_10k", "temp_100", "humidity_lab", "K2002"],
+        "scaling": "frame",
+    },
+    "timescale_db": {
+        "columns": ["date", "humidity_dut", "temp_table", "laser_power", "air_pressure", "frequency", "piezo_voltage"],
+        "skiprows": 1,
+        "scaling": "frame",
+    },
+    "timescale_db_015": {
+        "columns": ["date", "humidity_dut", "temp_table", "air_pressure", "diode_voltage", "piezo_voltage"],
+        "skiprows": 1,
+        "scaling": "frame",
+    },
+    "timescale_db_2": {
+        "columns": ["date", "output", "temperature"],
+        "skiprows": 1,
+        "scaling": "frame",
+    },
+    "timescale_db_3": {
+        "columns": ["date", "output", "temperature_room", "temperature_labnode"],
+        "skiprows": 1,
+        "scaling": "frame",
+    },
+    "timescale_db_4": {
+        "columns": lambda options: ["date"] + options["labels"],
+        "skiprows": 1,
+        "scaling": "frame",
+    },
+    "timescale_db_fluke5440b": {
+        "columns": ["date", "34470a", "3458a", "k2002", "dmm6500", "temperature"],
+        "skiprows": 1,
+        "scaling": "frame",
+    },
+}
+
+
+def _pyarrow_skiprows(filename, skiprows, date_range):
+    """
+    Returns the number of lines to skip when using the pyarrow engine or None if the file cannot be read by pyarrow. The
+    pyarrow engine does not support comments and cannot read compressed files in chunks. Comments at the beginning of
+    the log are skipped instead.
+    """
+    if filename.lower().endswith(csv_reader.COMPRESSED_EXTENSIONS):
+        return skiprows if date_range is None else None
+    with open(filename, "rb") as file:
+        lines = file.read(64 * 1024).split(b"\n")[:-1]  # Drop the last, possibly incomplete line
+    while skiprows < len(lines) and lines[skiprows].startswith(b"#"):
+        skiprows += 1
+    return None if any(line.startswith(b"#") for line in lines[skiprows:]) else skiprows
+
+
+def parse_schema_file(schema, filename, options, columns=None, date_range=None, **kwargs):
+    """
+    Reads a csv log described by one of the CSV_SCHEMAS. The dtypes are set up front and the pyarrow engine is used if
+    possible, because it is several times faster than the default engine.
+    """
+    names = schema["columns"](options) if callable(schema["columns"]) else schema["columns"]
+    required = [options.get(name) if name == "sensor_id" else name for name in schema.get("required", ("date",))]
+    csv_options = {
+        "header": None,
+        "skiprows": schema.get("skiprows", 0),
+        "usecols": range(len(names)),
+        "names": names,
+        "dtype": {name: schema.get("dtype", {}).get(name, "float64") for name in names if name != "date"},
+        "na_values": "None",
+    }
+
+    data = None
+    pyarrow_skiprows = _pyarrow_skiprows(filename, csv_options["skiprows"], date_range)
+    if pyarrow_skiprows is not None:
+        try:
+            pyarrow_options = {**csv_options, "skiprows": pyarrow_skiprows}
+            data = read_csv(filename, columns, required, date_range, engine="pyarrow", **pyarrow_options)
+        except (ImportError, KeyError, ValueError):
+            pass  # pyarrow is not installed or there is a comment further down in the file
+    if data is None:
+        data = read_csv(filename, columns, required, date_range, comment="#", **csv_options)
+
+    validity.mask_invalid(data)  # Mask the overflow readings
+    for key, conversion in schema.get("conversions", {}).items():
+        if key in data:
+            data[key] = conversion(data[key])
+    if schema.get("drop_rows"):
+        data = data[schema["drop_rows"] :]
+    data["date"] = parse_dates(data["date"], schema.get("date_format"))  # pyarrow already parses ISO dates
+
+    for post_function in schema.get("post", ()):
+        data = post_function(data, options)
+
+    data = scale_data(data, options, schema.get("scaling", "column"), existing_only=True)
+
+    return data, 0
+
+
+def schema_parser(schema):
+    def parse(filename, options, **kwargs):
+        return parse_schema_file(schema, filename, options, **kwargs)
+
+    return parse
+
+
 FILE_PARSER = {
     "34470A": parse_Keysight34470A_file,
     "34470A_resistance": parse_Keysight34470A_file_2,
@@ -1583,6 +1425,7 @@ FILE_PARSER = {
     "fluke1524": parse_fluke1524_file,
     "smi": parse_smi_file,
     "MSO9000": parse_MSO9000_file,
+    "MSO9000_bin": parse_MSO9000_bin_file,
     "RSA306": parse_RSA306_file,
     "3458A_SN18_1.0": parse_3458A_SN18_file_1,
     "3458A_SN18_2.0": parse_3458A_SN18_file_2,
@@ -1590,53 +1433,153 @@ FILE_PARSER = {
     "3458A_SN18_4.0": parse_3458A_SN18_file_4,
     "3458A_SN18_5.0": parse_3458A_SN18_file_5,
     "3458A_DgDrive": parse_3458A_dgDrive_file,
-    "3458A_Tempco": parse_3458A_tempco_file,
-    "3458A_Tempco_v2": parse_3458A_tempco_v2_file,
-    "3458A_Tempco_v3": parse_3458A_tempco_v3_file,
-    "3458A_Tempco_v4": parse_3458A_tempco_v4_file,
-    "3458A_Tempco_v5": parse_3458A_tempco_v5_file,
-    "3458A_Tempco_v6": parse_3458A_tempco_v6_file,
-    "3458A_Tempco_v7": parse_3458A_tempco_v7_file,
-    "3458A_Tempco_v8": parse_3458A_tempco_v8_file,
-    "3458A_Tempco_v9": parse_3458A_tempco_v9_file,
-    "3458A_Tempco_v11": parse_3458A_tempco_v11_file,
-    "3458A_Tempco_v12": parse_3458A_tempco_v12_file,
-    "3458A_Tempco_v13": parse_3458A_tempco_v13_file,
     "mecom": parse_mecom_file,
     "3458A_Fluke5440B": parse_3458A_5440B_file,
     "3458A_Fluke5440B_v2": parse_3458A_5440B_v2_file,
     "LM399_logger": parse_LM399_logger_file,
     "LM399_logger_v2": parse_LM399_logger_v2_file,
-    "LTZ1000_logger": parse_LTZ1000_logger_file,
-    "LTZ1000_logger_v2": parse_LTZ1000_logger_v2_file,
-    "LTZ1000_logger_v3": parse_LTZ1000_logger_v3_file,
     "3478A": parse_3478A_file,
     "RTH1004": parse_RTH1004_file,
+    "RTH1004_bin": parse_RTH1004_bin_file,
     "RTH1004_spectrum": parse_RTH1004_spectrum_file,
-    "Fluke5440B_test": parse_Fluke5440B_test_file,
     "slice_qtc": parse_slice_qtc_file,
-    "Fluke5440B_test_v2": parse_Fluke5440B_test_file_v2,
     "Kraken": parse_labtemp_drift_file,
     "rth_digital": parse_rth_digital_file,
     "scan2000": parse_SCAN2000_file,
     "ws8": parse_WS8_file,
-    "timescale_db": parse_timescale_db_file,
-    "timescale_db_015": parse_timescale_db_015_file,
-    "timescale_db_2": parse_timescale_db_file_v2,
-    "timescale_db_3": parse_timescale_db_file_v3,
-    "timescale_db_4": parse_timescale_db_file_v4,
-    "timescale_db_fluke5440b": parse_timescale_db_fluke5440b,
     "data_logger_fluke5440b": parse_data_logger_fluke5440b,
     "data_logger_short_dmm": parse_data_logger_short_dmm,
     "data_logger_short_dmm_frank": parse_data_logger_short_dmm_frank,
     "noise_gen": noise_gen,
     "dgdrive_powermeter": parse_data_dgdrive_powermeter,
     "ltspice_fets": parse_data_ltspice_fets,
+    "ltspice_raw": parse_ltspice_raw,
     "bode100": parse_bode100_file,
     "output_impedance_generic": parse_output_impedance_generic,
+    "output_impedance_multisine": parse_output_impedance_multisine,
     "concat_series": concat_series,
+    **{name: schema_parser(schema) for name, schema in CSV_SCHEMAS.items()},
 }
 
 
-def parse_file(parser, filename, **kwargs):
-    return FILE_PARSER[parser](filename=filename, **kwargs)
+def schema_signature(schema):
+    # The schema logs have a date in the first column and exactly the columns of the schema
+    signature = {"skiprows": schema.get("skiprows", 0), "date_column": 0}
+    if callable(schema["columns"]):
+        signature["min_fields"] = 2
+    else:
+        signature.update(fields=len(schema["columns"]), columns=schema["columns"])
+    return signature
+
+
+# The signatures used to detect the parser of a file, if the config sets parser="auto". See format_detection for the
+# criteria. Each signature must identify the format by its content, i.e. the magic bytes, a banner or the column names.
+# Parsers without a distinctive header cannot be detected and must be named in the config.
+FILE_SIGNATURES = {
+    "34470A": {"banner": re.compile(rb"\AStart date:,.*\r?\nSample interval:,"), "skiprows": 3, "fields": 2},
+    "smi": {"banner": re.compile(rb"\A# Data exported by SMI"), "skiprows": 1, "fields": 4, "date_column": 1},
+    # The records of the Fluke 1524 have the unit and the time with tenths of a second in front of the date
+    "fluke1524": {
+        "banner": re.compile(rb"\A[^,\r\n]*,[0-9]+,[-+0-9.]+,[CFK],[0-9]{1,2}:[0-9]{2}:[0-9]{2}\.[0-9],[0-9]{4}-"),
+        "fields": 6,
+        "date_column": 5,
+    },
+    "MSO9000_bin": {"magic": (b"AG", b"\x89HDF\r\n\x1a\n"), "extensions": (".bin", ".h5")},
+    "RSA306": {"banner": RSA306_RBW_REGEX},
+    "RTH1004": {
+        "banner": re.compile(rb"\AModel,RTH1004\b.*^Waveform Type,ANALOG,", re.MULTILINE | re.DOTALL),
+        "skiprows": 22,
+        "min_fields": 2,
+    },
+    "RTH1004_bin": {"banner": rb'Name="SignalFormat"', "extensions": (".bin",)},
+    "RTH1004_spectrum": {"banner": re.compile(rb"^RBW \[[A-Za-z]+\],", re.MULTILINE)},
+    "rth_digital": {"banner": re.compile(rb"\AModel,RTH1004\b"), "skiprows": 22, "fields": 9},
+    "ltspice_raw": {"magic": ("Title:".encode("utf-16-le"), b"Title:"), "extensions": (".raw",)},
+    "bode100": {"banner": BODE100_DATA_REGEX},
+    **{name: schema_signature(schema) for name, schema in CSV_SCHEMAS.items()},
+}
+
+
+def detect_parser(filename):
+    """
+    Returns the name of the parser for a file by matching its head against the FILE_SIGNATURES. The decision is cached
+    per file hash.
+    """
+    if not file_cache.CACHE_ENABLED or not os.path.isfile(filename):
+        return format_detection.detect_format(filename, FILE_SIGNATURES)
+
+    key = file_cache.cache_key(filename, "auto", format_detection.detect_format, signatures=FILE_SIGNATURES)
+    parser = file_cache.load(key)
+    if parser is None:
+        parser = format_detection.detect_format(filename, FILE_SIGNATURES)
+        file_cache.store(key, parser)
+    return parser
+
+
+def is_date_range(date_range):
+    """
+    Returns True if the bounds of the crop are dates. Numeric crops like (0, 24) would be read as timestamps in 1970.
+    """
+    for bound in date_range:
+        if bound is None:
+            continue
+        if isinstance(bound, (int, float, np.number)):
+            return False
+        try:
+            csv_reader.to_utc_timestamp(bound)
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
+def is_window_independent(parser, options):
+    """
+    Returns True if the rows of a time window are the same, whether the whole file or only the window is parsed.
+    Scaling functions may use the statistics of the whole file, like x["value"].mean() or data.date.iloc[0], so only
+    scaling expressions without reductions qualify. The outlier removal and the block averaging need the whole file
+    as well, and the "drop_rows" of a schema refer to the first rows of the file.
+    """
+    options = options or {}
+    if options.get("remove_outliers") or options.get("block_average"):
+        return False
+    if CSV_SCHEMAS.get(parser, {}).get("drop_rows"):
+        return False
+    return all(
+        isinstance(scaling, str) and scaling_expressions.is_row_local(scaling)
+        for scaling in options.get("scaling", {}).values()
+    )
+
+
+def parse_file(parser, filename, columns=None, date_range=None, **kwargs):
+    if parser == "auto":
+        parser = detect_parser(filename)
+        print(f"  Detected file format: {parser}")
+    if date_range is not None and is_date_range(date_range) and is_window_independent(parser, kwargs.get("options")):
+        # Parsers reading time-stamped logs can skip the rows outside of the time window
+        kwargs["date_range"] = tuple(date_range)
+    sensor_settings = (kwargs.get("options") or {}).get("sensors")
+    outlier_settings = (kwargs.get("options") or {}).get("remove_outliers")
+    if columns is not None:
+        # Some parsers can skip the columns not needed by the plot. The scaling functions are applied by the parser,
+        # so the columns used by them must be read as well.
+        scaling_columns = get_scaling_columns((kwargs.get("options") or {}).get("scaling", {}))
+        if scaling_columns is not None:
+            kwargs["columns"] = frozenset(columns) | scaling_columns
+            if sensor_settings:
+                kwargs["columns"] |= frozenset(settings["column"] for settings in sensor_settings.values())
+            if outlier_settings:
+                kwargs["columns"] |= frozenset(outlier_settings.get("columns", ("value",)))
+    result = file_cache.cached_parse(parser, FILE_PARSER[parser], filename=filename, **kwargs)
+
+    if isinstance(result, tuple) and isinstance(result[0], pd.DataFrame):
+        if not _applies_stages(FILE_PARSER[parser]):
+            # The other parsers convert the sensors and remove the outliers before scaling
+            if sensor_settings:
+                result = sensors.convert_sensors(result[0], sensor_settings), result[1]
+            # Remove the outliers before averaging, so that they do not spread into the averages
+            if outlier_settings:
+                result = outliers.remove_outliers(result[0], outlier_settings), result[1]
+        block_settings = (kwargs.get("options") or {}).get("block_average")
+        if block_settings:
+            result = block_average.average_blocks(*result, block_settings)
+    return result
@@ -5,20 +5,23 @@ import glob
 import importlib
 
 import matplotlib
-import matplotlib.legend
-import matplotlib.mlab as mlab
-import matplotlib.pyplot as plt
 import numpy as np
 import os
 import pandas as pd
 from matplotlib.ticker import ScalarFormatter
-from scipy.optimize import curve_fit
-from scipy.stats.distributions import t
-import seaborn as sns
-
-import lttb
 
 from file_parser import parse_file
+import shared_frames
+from lazy_import import lazy_import
+from worker_pool import POOL_TYPES, map_ordered
+
+# Importing these modules takes seconds, so they are only loaded when used
+mlab = lazy_import("matplotlib.mlab")
+plt = lazy_import("matplotlib.pyplot")
+optimize = lazy_import("scipy.optimize")
+distributions = lazy_import("scipy.stats.distributions")
+sns = lazy_import("seaborn")
+lttb = lazy_import("lttb")
 
 __version__ = "0.9.0"
 
@@ -49,8 +52,6 @@ tex_fonts = {
     ),
     "savefig.directory": os.path.dirname(os.path.realpath(__file__)),
 }
-plt.rcParams.update(tex_fonts)
-plt.style.use("tableau-colorblind10")
 # end of settings
 
 
@@ -67,7 +68,7 @@ def fit_exponential_decay(x_data, y_data, initial_theta):
     initial_t0 = 0
     initial_offset = min(y_data.values)
     initial_start = max(y_data.values) - initial_offset
-    return curve_fit(
+    return optimize.curve_fit(
         exponential_decay,
         t,
         y_data.values,
@@ -135,13 +136,26 @@ def downsample_data(x_data, y_data):
     return x_data, y_data
 
 
-def load_data(plot_file):
+def load_data(plot_file, columns=None, date_range=None):
     print(f"  Parsing: '{plot_file['filename']}'...")
-    data = parse_file(**plot_file)
+    data = parse_file(**plot_file, columns=columns, date_range=date_range)
 
     return data
 
 
+def get_required_columns(plot):
+    # The parsers only need to read the columns used by the plot. The date is required to fit the step response.
+    columns = {"date", *plot["primary_axis"]["columns_to_plot"]}
+    if plot.get("secondary_axis", {}).get("show", True):
+        columns |= set(plot["secondary_axis"]["columns_to_plot"])
+    return columns
+
+
+def get_date_range(plot):
+    # Only the rows inside the zoom window need to be parsed
+    return plot.get("zoom")
+
+
 def crop_data(data, zoom_date=None, crop_secondary=None):
     if zoom_date is not None:
         index_to_drop = data[(data.date < zoom_date[0]) | (data.date > zoom_date[1])].index
@@ -197,11 +211,20 @@ def plot_data(ax, data, x_axis, column_settings):
             ax.plot(x_data, y_data, marker="", alpha=0.7, **settings)
 
 
-def plot_series(plot, show_plot_window):
+def plot_series(plot, show_plot_window, jobs=None, pool="process"):
     print(f"Plotting {plot['description']}")
     # Load the data to be plotted
     plot_files = (plot_file for plot_file in plot["files"] if plot_file.get("show", True))
-    data = pd.concat((load_data(plot_file)[0] for plot_file in plot_files), sort=True)
+    columns = get_required_columns(plot)
+    date_range = get_date_range(plot)
+    results = map_ordered(
+        lambda plot_file: load_data(plot_file, columns, date_range),
+        plot_files,
+        jobs=jobs,
+        pool=pool,
+        group_by=lambda plot_file: plot_file["filename"],
+    )
+    data = pd.concat((result[0] for result in results), sort=True)
     # Drop non-complete rows
     if plot.get("secondary_axis", {}).get("show", True):
         data.dropna(
@@ -258,7 +281,7 @@ def plot_series(plot, show_plot_window):
             n_params = len(params)  # number of constants
             dof = max(0, n - n_params)  # number of degrees of freedom
             # student-t value for the dof and confidence level
-            tval = t.ppf(1.0 - alpha / 2.0, dof)
+            tval = distributions.t.ppf(1.0 - alpha / 2.0, dof)
             sigma_squared = np.diag(pcov)
             output_step = max(data[list(plot_settings["columns_to_plot"])[0]]) - min(
                 data[list(plot_settings["columns_to_plot"])[0]]
@@ -331,6 +354,12 @@ def init_argparse() -> argparse.ArgumentParser:
     parser.add_argument("-v", "--version", action="version", version=f"{parser.prog} version {__version__}")
     parser.add_argument("plotfile", help="One or more yaml configurations to plot.")
     parser.add_argument("--silent", action="store_true", help="Do not show the plot when set.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="Number of files loaded in parallel. Defaults to the number of CPUs."
+    )
+    parser.add_argument(
+        "--pool", choices=POOL_TYPES, default="process", help="Load the files using processes or threads."
+    )
 
     return parser
 
@@ -338,6 +367,9 @@ def init_argparse() -> argparse.ArgumentParser:
 if __name__ == "__main__":
     parser = init_argparse()
     args = parser.parse_args()
+    # Apply the settings only now, so that --version does not import pyplot
+    plt.rcParams.update(tex_fonts)
+    plt.style.use("tableau-colorblind10")
     plot_files = glob.glob(args.plotfile)
     for file_path in plot_files:
         module_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -345,6 +377,9 @@ if __name__ == "__main__":
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
         try:
-            plot_series(plot=module.plot, show_plot_window=not args.silent)
+            plot_series(plot=module.plot, show_plot_window=not args.silent, jobs=args.jobs, pool=args.pool)
         except FileNotFoundError as exc:
             print(f"  Data file not found. Cannot plot graph: {exc}")
+        finally:
+            # The data loaded by the workers is no longer needed, once the figure is saved
+            shared_frames.release()
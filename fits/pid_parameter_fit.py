@@ -1,6 +1,7 @@
-import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind", 11)
 phi = (5**0.5 - 1) / 2  # golden ratio
 plot = {
@@ -76,7 +77,7 @@ plot = {
                     3: "temperature_labnode",
                 },
                 "scaling": {
-                    "date": lambda x: pd.to_datetime(x.date, utc=True),
+                    "date": lambda x: parse_dates(x.date),
                     "temperature_labnode": lambda x: x["temperature_labnode"] - 273.15,
                     "temperature_room": lambda x: x["temperature_room"] - 273.15,
                 },
@@ -0,0 +1,151 @@
+"""
+Detection of the file format from the first few KB of a file. Each parser can register a signature, which is a dict of
+criteria, that must all match:
+  "magic": The file starts with these bytes, or one of them if a tuple is given.
+  "banner": A regular expression, that is searched in the head of the file, e.g. an instrument banner.
+  "extensions": A tuple of file extensions, that exclude compression suffixes like ".zip".
+  "skiprows": The number of header lines before the data, not counting the comment lines starting with "#", like
+    pd.read_csv(comment="#", header=skiprows - 1). Defaults to 0.
+  "fields": The exact number of fields of each data row.
+  "min_fields": The minimum number of fields of each data row.
+  "date_column": The index of the field holding the date. The header lines must not have a date in this field.
+  "columns": The names of the columns. This is not required, but if the file has a header or comment line with these
+    names, the signature is preferred.
+  "delimiter": Defaults to ",".
+The layout of the data alone, e.g. two fields after 22 header lines, matches far too many files, so a file is only
+detected if the magic bytes, the banner or the column names of the signature match. The more specific a matching
+signature, the higher its score. The parser with the highest score wins. If several parsers have the same score, the
+format is ambiguous and the parser must be named in the config.
+"""
+import os
+import re
+
+import csv_reader
+
+HEAD_SIZE = 16 * 1024  # Number of bytes read from the file
+SAMPLE_ROWS = 5  # Number of data rows checked
+DATE_REGEX = re.compile(rb'^\s*"?(?:[0-9]{4}-[0-9]{2}-[0-9]{2}|[0-9]{1,2}[./][0-9]{1,2}[./][0-9]{2,4})')
+# The points given for each matching criterion. Signatures identifying a format by its content beat structural ones.
+SCORES = {
+    "magic": 16,
+    "banner": 8,
+    "columns": 8,
+    "fields": 4,
+    "date_column": 2,
+    "skiprows": 1,
+    "min_fields": 1,
+    "extensions": 1,
+}
+CONTENT_CRITERIA = ("magic", "banner", "columns")  # The criteria, that identify a format
+
+
+def _extension(filename):
+    # Use the extension of the uncompressed file, e.g. ".raw" for "sim.raw.gz"
+    name = filename.lower()
+    for compressed_extension in csv_reader.COMPRESSED_EXTENSIONS:
+        if name.endswith(compressed_extension):
+            name = name[: -len(compressed_extension)]
+            break
+    return os.path.splitext(name)[1]
+
+
+def _split_lines(head):
+    # The last line is probably cut off, unless the whole file was read
+    lines = head.split(b"\n")
+    if len(head) >= HEAD_SIZE:
+        lines = lines[:-1]
+    return [line.rstrip(b"\r") for line in lines]
+
+
+def _header_names(line, delimiter):
+    return [name.strip().strip('"').lower() for name in line.lstrip(b"#").decode("latin-1").split(delimiter)]
+
+
+def _is_dated(line, date_column, delimiter):
+    fields = line.split(delimiter)
+    return len(fields) > date_column and DATE_REGEX.match(fields[date_column]) is not None
+
+
+def score(signature, head, filename):
+    """
+    Returns the score of a signature for the head of a file and whether one of the CONTENT_CRITERIA matched, or None if
+    the signature does not match.
+    """
+    points = 0
+    identified = bool(signature.keys() & {"magic", "banner"})  # They must match, otherwise None is returned
+    if "magic" in signature:
+        magic = signature["magic"] if isinstance(signature["magic"], tuple) else (signature["magic"],)
+        if not head.startswith(magic):
+            return None
+        points += SCORES["magic"]
+    if "banner" in signature:
+        if re.search(signature["banner"], head) is None:
+            return None
+        points += SCORES["banner"]
+    if "extensions" in signature:
+        if _extension(filename) not in signature["extensions"]:
+            return None
+        points += SCORES["extensions"]
+    if not signature.keys() & {"fields", "min_fields", "date_column", "skiprows", "columns"}:
+        return points, identified
+
+    # Check the layout of the csv data. The comments are dropped first, like pd.read_csv(comment="#") does.
+    delimiter = signature.get("delimiter", ",")
+    skiprows = signature.get("skiprows", 0)
+    all_lines = _split_lines(head)
+    lines = [line for line in all_lines if not line.startswith(b"#")]
+    if len(lines) <= skiprows:
+        return None
+    header_lines = lines[:skiprows]
+    data_lines = [line for line in lines[skiprows:] if line.strip()][:SAMPLE_ROWS]
+    if not data_lines:
+        return None
+    # The comment block in front of the data may hold the column names
+    comments = [line for line in all_lines[: all_lines.index(data_lines[0])] if line.startswith(b"#")]
+    field_counts = {len(line.split(delimiter.encode())) for line in data_lines}
+    if "fields" in signature:
+        if field_counts != {signature["fields"]}:
+            return None
+        points += SCORES["fields"]
+    if "min_fields" in signature:
+        if min(field_counts) < signature["min_fields"]:
+            return None
+        points += SCORES["min_fields"]
+    if "date_column" in signature:
+        date_column = signature["date_column"]
+        if not all(_is_dated(line, date_column, delimiter.encode()) for line in data_lines):
+            return None
+        # Otherwise a log without a header would also match the signatures with header lines
+        if header_lines and _is_dated(header_lines[-1], date_column, delimiter.encode()):
+            return None
+        points += SCORES["date_column"]
+    if skiprows:
+        points += SCORES["skiprows"]
+    if "columns" in signature:
+        names = [name.lower() for name in signature["columns"]]
+        if any(_header_names(line, delimiter) == names for line in header_lines[-1:] + comments[-1:]):
+            points += SCORES["columns"]
+            identified = True
+    return points, identified
+
+
+def detect_format(filename, signatures):
+    """
+    Returns the name of the signature, that matches the file best. Raises a ValueError if none or several match
+    equally well, or if the file only matches the layout of the data.
+    """
+    head = csv_reader.read_head(filename, HEAD_SIZE)
+    matches = {name: score(signature, head, filename) for name, signature in signatures.items()}
+    matches = {name: match for name, match in matches.items() if match is not None}
+    scores = {name: points for name, (points, identified) in matches.items() if identified}
+    if not scores:
+        layout_matches = f" It only has the layout of {', '.join(sorted(matches))}." if matches else ""
+        raise ValueError(f"Cannot detect the format of {filename}.{layout_matches} Set the parser in the config.")
+    best_score = max(scores.values())
+    candidates = sorted(name for name, points in scores.items() if points == best_score)
+    if len(candidates) > 1:
+        raise ValueError(
+            f"The format of {filename} is ambiguous, it matches the parsers {', '.join(candidates)}. Set the parser in "
+            "the config."
+        )
+    return candidates[0]
@@ -0,0 +1,72 @@
+"""
+An in-process LRU memo of the raw DataFrames read from the data files. Several plot entries and figures often read the
+same file, e.g. a multi-sensor log with different sensor ids. The raw frame is cached before the parser selects,
+filters and scales the data, so all of them can share it. Each caller gets a copy-on-write view of the cached frame.
+The memo lives in the process reading the file, so the plots run the entries of the same file in the same worker, see
+the group_by argument of worker_pool.map_ordered().
+The memo size can be set using the environment variable FILE_PARSER_MEMO_SIZE (in MiB), 0 disables it.
+"""
+import os
+from collections import OrderedDict
+
+import pandas as pd
+
+import file_cache
+
+MEMO_SIZE = int(os.environ.get("FILE_PARSER_MEMO_SIZE", 1024)) * 1024**2
+
+_memo = OrderedDict()  # The frames and their size in bytes
+_memo_size = 0
+
+
+def _copy_on_write_enabled():
+    # Copy-on-write is always enabled starting with pandas 3
+    return int(pd.__version__.split(".", maxsplit=1)[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+def _view(data):
+    # Without copy-on-write, the parsers would modify the cached frame, so a real copy is required
+    return data.copy(deep=not _copy_on_write_enabled())
+
+
+def _frame_size(data):
+    # Include the strings, otherwise a log with text columns is a multiple of its accounted size
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def clear():
+    global _memo_size  # pylint: disable=global-statement
+    _memo.clear()
+    _memo_size = 0
+
+
+def memoized_read(read_function, filename, **kwargs):
+    """
+    Returns read_function(filename, **kwargs) from the memo or calls it. The key contains the modification time and size
+    of the file, so a modified file is read again.
+    """
+    global _memo_size  # pylint: disable=global-statement
+
+    if MEMO_SIZE <= 0 or not isinstance(filename, str) or not os.path.isfile(filename):
+        return read_function(filename, **kwargs)
+
+    stat = os.stat(filename)
+    try:
+        key = (os.path.realpath(filename), stat.st_mtime_ns, stat.st_size, file_cache.canonicalize(kwargs))
+    except TypeError as exc:
+        print(f"    Not memoizing: {exc}")
+        return read_function(filename, **kwargs)
+    if key in _memo:
+        _memo.move_to_end(key)
+        print("    Using data already read.")
+        return _view(_memo[key][0])
+
+    data = read_function(filename, **kwargs)
+    size = _frame_size(data)
+    if size <= MEMO_SIZE:
+        _memo[key] = (data, size)
+        _memo_size += size
+        while _memo_size > MEMO_SIZE:
+            _, (_, evicted_size) = _memo.popitem(last=False)
+            _memo_size -= evicted_size
+    return _view(data)
@@ -0,0 +1,127 @@
+"""
+Estimation of the frequency of a sampled sine wave. Picking the peak of a full-length FFT limits the resolution to
+one bin and costs a full FFT of the capture. Instead, a short FFT finds the peak roughly and a zoom FFT around this peak
+refines the estimate using the whole capture:
+1. Coarse: FFT of the first COARSE_SIZE samples and of the whole capture decimated to COARSE_SIZE points by block
+   averaging. The latter resolves slow tones, which do not complete enough periods within the short segment.
+2. Zoom: The capture is mixed down by the coarse estimate, low-pass filtered and decimated by block averaging. The FFT
+   of the baseband signal has the resolution of a full-length FFT, but only COARSE_SIZE points.
+The zoom FFT cannot separate the tone from the image of the mixer for tones close to DC or to the Nyquist frequency.
+These are estimated from a full-length FFT instead.
+The peak of each spectrum is interpolated to a fraction of a bin from the ratio of the two largest bins of the Hann
+windowed spectrum.
+"""
+import numpy as np
+
+COARSE_SIZE = 4096  # Number of points of the coarse and the zoom FFT
+
+
+def _block_average(samples, size):
+    # Low-pass filter and decimate to about `size` points. The remaining samples at the end are dropped.
+    factor = -(-len(samples) // size)
+    length = len(samples) // factor
+    return samples[: length * factor].reshape(length, factor).mean(axis=1), factor
+
+
+def _hann_spectrum(samples, fft=np.fft.rfft):
+    # The periodic Hann window is required for the exact interpolation of the peak. The spectrum is normalized to the
+    # amplitude of a tone.
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(len(samples)) / len(samples))
+    return np.abs(fft(samples * window)) / (window.sum() / 2)
+
+
+def _interpolate_peak(spectrum, i):
+    # The ratio of the two largest bins gives the exact position of a tone for a Hann window (Grandke 1983)
+    if i == 0 or i == len(spectrum) - 1 or spectrum[i] == 0:
+        return float(i)
+    direction = 1 if spectrum[i + 1] > spectrum[i - 1] else -1
+    ratio = spectrum[i + direction] / spectrum[i]
+    return i + direction * (2 * ratio - 1) / (ratio + 1)
+
+
+def _peak(spectrum, first_bin=0):
+    """
+    Returns the fractional index and the height of the maximum of a Hann windowed magnitude spectrum, ignoring the bins
+    below `first_bin`.
+    """
+    i = first_bin + int(np.argmax(spectrum[first_bin:]))
+    return _interpolate_peak(spectrum, i), spectrum[i]
+
+
+def _coarse_estimate(samples, sample_rate):
+    """
+    Returns the frequency estimated from a short segment or from the decimated capture and whether the whole capture was
+    used. The segment covers all frequencies, but cannot resolve slow tones. The decimated capture resolves slow tones,
+    but attenuates and aliases fast tones. The spectrum with the larger peak wins.
+    """
+    segment = samples[:COARSE_SIZE]
+    peak, height = _peak(_hann_spectrum(segment), first_bin=2)  # Skip the residual DC offset
+    if len(samples) <= COARSE_SIZE:
+        return peak * sample_rate / len(segment), True
+
+    decimated, factor = _block_average(samples, COARSE_SIZE)
+    decimated_peak, decimated_height = _peak(_hann_spectrum(decimated), first_bin=2)
+    if decimated_height >= height:
+        return decimated_peak * sample_rate / factor / len(decimated), True
+    return peak * sample_rate / len(segment), False
+
+
+def _zoom_estimate(samples, sample_rate, frequency):
+    """
+    Mixes the tone down to DC, then filters and decimates the baseband signal by block averaging, so that its FFT spans
+    the whole capture. Returns None if the mirror image of the mixer at -2f aliases into the search window.
+    """
+    # Search within the uncertainty of the coarse estimate only
+    width = 2 * sample_rate / COARSE_SIZE
+    image = (-2 * frequency + sample_rate / 2) % sample_rate - sample_rate / 2
+    if abs(image) < 2 * width:
+        return None
+
+    # exp(-i omega (j * factor + k)) = exp(-i omega j * factor) * exp(-i omega k), so the mixer is applied to each block
+    # of `factor` samples by a matrix product.
+    factor = -(-len(samples) // COARSE_SIZE)
+    blocks = samples[: len(samples) // factor * factor].reshape(-1, factor)
+    omega = 2 * np.pi * frequency / sample_rate
+    phase = omega * np.arange(factor)
+    baseband = (blocks @ np.cos(phase) - 1j * (blocks @ np.sin(phase))) / factor
+    baseband *= np.exp(-1j * omega * factor * np.arange(len(baseband)))
+
+    spectrum = np.fft.fftshift(_hann_spectrum(baseband, fft=np.fft.fft))
+    bin_width = sample_rate / factor / len(baseband)
+    center = len(baseband) // 2
+    start = max(center - int(width / bin_width) - 2, 0)
+    offset = start + _peak(spectrum[start : center + int(width / bin_width) + 3])[0] - center
+    return frequency + offset * bin_width
+
+
+def estimate_frequency(samples, sample_rate):
+    """
+    Returns the frequency in Hz of the strongest tone in the samples. The resolution is a fraction of the bin width
+    sample_rate / len(samples) of a full-length FFT.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    samples = samples - samples.mean()
+    frequency, uses_whole_capture = _coarse_estimate(samples, sample_rate)
+    if uses_whole_capture:
+        return frequency
+    refined_frequency = _zoom_estimate(samples, sample_rate, frequency)
+    if refined_frequency is None:
+        # The short segment does not resolve a tone this close to DC or to the Nyquist frequency
+        peak, _ = _peak(_hann_spectrum(samples), first_bin=2)
+        return peak * sample_rate / len(samples)
+    return refined_frequency
+
+
+def find_tones(samples, sample_rate, threshold=-20):
+    """
+    Returns the frequencies in Hz of all tones in the samples, that are at most `threshold` dB weaker than the strongest
+    tone, e.g. the lines of a multisine excitation. The threshold must be above the first side lobe of the Hann window
+    at -31 dB.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    spectrum = _hann_spectrum(samples - samples.mean())
+    spectrum[:2] = 0  # Skip the residual DC offset
+    inner = spectrum[1:-1]
+    is_peak = (inner > spectrum[:-2]) & (inner >= spectrum[2:]) & (inner >= spectrum.max() * 10 ** (threshold / 20))
+    peaks = np.flatnonzero(is_peak) + 1
+    return np.array([_interpolate_peak(spectrum, i) for i in peaks]) * sample_rate / len(samples)
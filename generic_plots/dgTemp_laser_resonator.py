@@ -1,20 +1,10 @@
-import numpy as np
-import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+from sensors import resistance_to_temperature
 
-def convertResistanceToTemperature(values):
-    # Constants for Amphenol DC95 (Material Type 10kY)
-    a = 3.3540153 * 10**-3
-    b = 2.7867185 * 10**-4
-    c = 4.0006637 * 10**-6
-    d = 1.5575628 * 10**-7
-    rt25 = 10 * 10**3
-
-    return (
-        1 / (a + b * np.log(values / rt25) + c * np.log(values / rt25) ** 2 + d * np.log(values / rt25) ** 3) - 273.15
-    )
-
+ADC_TO_RESISTANCE = 4.096 / (2**31 - 1) / 50e-6
+SETPOINT_TEMPERATURE = float(resistance_to_temperature(300000000 * ADC_TO_RESISTANCE, "DC95_10kY"))
 
 colors = sns.color_palette("colorblind")
 phi = (5**0.5 - 1) / 2  # golden ratio
@@ -72,12 +62,14 @@ plot = {
                     1: "date",
                     2: "adc_code",
                 },
+                "sensors": {
+                    "temperature_absolute": {"column": "adc_code", "sensor": "DC95_10kY", "scale": ADC_TO_RESISTANCE},
+                },
                 "scaling": {
-                    "resistance": lambda x: x["adc_code"] / (2**31 - 1) * 4.096 / (50 * 10**-6),
-                    "temperature": lambda x: convertResistanceToTemperature(x["resistance"])
-                    - convertResistanceToTemperature(300000000 * 4.096 / (2**31 - 1) / (50 * 10**-6)),
-                    "setpoint": lambda x: np.zeros(len(x)),
-                    "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                    "resistance": "adc_code / (2**31 - 1) * 4.096 / 50e-6",
+                    "temperature": f"temperature_absolute - {SETPOINT_TEMPERATURE}",
+                    "setpoint": "0",
+                    "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                 },
             },
         },
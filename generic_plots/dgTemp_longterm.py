@@ -1,6 +1,8 @@
 import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 phi = (5**0.5 - 1) / 2  # golden ratio
 plot = {
@@ -91,7 +93,7 @@ plot = {
                     * 4.096
                     / (50 * 10**-6)
                     + 2e-3,
-                    "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                    "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                 },
             },
         },
@@ -106,7 +108,7 @@ plot = {
                 },
                 "scaling": {
                     "fluke1590": lambda data: (data["fluke1590"] - data["fluke1590"].mean()),
-                    "date": lambda data: pd.to_datetime(data.date, utc=True)
+                    "date": lambda data: parse_dates(data.date)
                     - pd.to_datetime(data.date.iloc[0], utc=True)
                     + pd.Timestamp("2019-07-06 00:00:00", tz="UTC"),
                 },
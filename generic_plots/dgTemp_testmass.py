@@ -1,20 +1,6 @@
-import numpy as np
-import pandas as pd
 import seaborn as sns
 
-
-def convertResistanceToTemperature(values):
-    # Constants for Amphenol DC95 (Material Type 10kY)
-    a = 3.3540153 * 10**-3
-    b = 2.7867185 * 10**-4
-    c = 4.0006637 * 10**-6
-    d = 1.5575628 * 10**-7
-    rt25 = 10 * 10**3
-
-    return (
-        1 / (a + b * np.log(values / rt25) + c * np.log(values / rt25) ** 2 + d * np.log(values / rt25) ** 3) - 273.15
-    )
-
+from date_parser import parse_dates
 
 colors = sns.color_palette("colorblind")
 phi = (5**0.5 - 1) / 2  # golden ratio
@@ -84,10 +70,12 @@ plot = {
                     0: "date",
                     1: "voltage",
                 },
+                "sensors": {
+                    "temperature_mass": {"column": "voltage", "sensor": "DC95_10kY", "scale": 1 / 50e-6},
+                },
                 "scaling": {
-                    "temperature_mass": lambda x: convertResistanceToTemperature(x["voltage"] / (50 * 10**-6)),
-                    "temperature_mean": lambda x: x["temperature_mass"] - x["temperature_mass"].mean() - 40e-6,
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "temperature_mean": "temperature_mass - mean(temperature_mass) - 40e-6",
+                    "date": lambda data: parse_dates(data.date),
                 },
             },
         },
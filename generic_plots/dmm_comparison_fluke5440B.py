@@ -1,6 +1,7 @@
-import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 phi = (5**0.5 - 1) / 2  # golden ratio
 plot = {
@@ -83,7 +84,7 @@ plot = {
                     5: "temperature",
                 },
                 "scaling": {
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "date": lambda data: parse_dates(data.date),
                     "KS34470A": lambda data: data["KS34470A"] - data["KS34470A"].mean() + 2 * 10**-5,
                     "HP3458A": lambda data: data["HP3458A"] - data["HP3458A"].mean() + 10**-5,
                     "K2002": lambda data: data["K2002"] - data["K2002"].mean(),
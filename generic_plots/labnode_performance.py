@@ -1,6 +1,7 @@
-import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 phi = (5**0.5 - 1) / 2  # golden ratio
 plot = {
@@ -68,7 +69,7 @@ plot = {
                     7: "temperature_out_of_loop",
                 },
                 "scaling": {
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "date": lambda data: parse_dates(data.date),
                     "temperature_in_loop": lambda data: data["temperature_in_loop"]
                     .str.removesuffix(" °C")
                     .astype(float),
@@ -1,6 +1,7 @@
-import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 phi = (5**0.5 - 1) / 2  # golden ratio
 plot = {
@@ -44,7 +45,7 @@ plot = {
                     1: "temperature",
                 },
                 "scaling": {
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "date": lambda data: parse_dates(data.date),
                     "temperature": lambda data: data["temperature"] - 273.15,
                 },
             },
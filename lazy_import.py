@@ -0,0 +1,37 @@
+"""
+Deferred imports of heavy dependencies. Each driver is started in a fresh interpreter per figure and importing
+matplotlib, seaborn, scipy or statsmodels takes seconds, even for `--version` or for plots that never use them.
+A lazily imported module is loaded on the first access to one of its attributes:
+    plt = lazy_import("matplotlib.pyplot")
+"""
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    A placeholder for a module, that imports the module on first use and forwards all attribute accesses to it.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attribute):
+        # Only called for attributes not found on the placeholder itself
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """
+    Returns a placeholder for the module `name`, that is only imported when it is used.
+    """
+    return LazyModule(name)
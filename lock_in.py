@@ -0,0 +1,71 @@
+"""
+Digital lock-in demodulation of sampled sine waves. If the frequency is known, the model
+    ampl * sin(omega * t + phi) + offset = a * sin(omega * t) + b * cos(omega * t) + offset
+is linear in a, b and the offset. It can therefore be solved by linear least-squares instead of an iterative nonlinear
+fit. All channels share the same design matrix, so they are solved at once. A multisine is fitted the same way using a
+sine and a cosine column per frequency.
+"""
+import numpy as np
+
+
+def fit_sines(time, channels, frequencies):
+    """
+    Fits the sum of ampl_k * sin(2 pi frequencies[k] * t + phi_k) and an offset to each column of `channels`, which is
+    an array of shape (N,) or (N, channels). Returns a dict of arrays: "amplitude", "phase" and their standard errors
+    "amplitude_stderr", "phase_stderr" of shape (frequencies, channels), "offset" and "offset_stderr" of shape
+    (channels,). The amplitudes are positive and the phases are in (-pi, pi].
+    """
+    time = np.asarray(time, dtype=np.float64)
+    channels = np.asarray(channels, dtype=np.float64)
+    channels = channels.reshape(channels.shape[0], -1)
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=np.float64))
+
+    # Start the time at zero to keep the phase argument small
+    phase = 2 * np.pi * np.outer(time - time[0], frequencies)
+    design_matrix = np.column_stack((np.sin(phase), np.cos(phase), np.ones_like(time)))
+    coefficients, residuals, rank, _ = np.linalg.lstsq(design_matrix, channels, rcond=None)
+    if rank < design_matrix.shape[1]:
+        raise ValueError(
+            "Cannot fit the sines, the time series does not contain enough independent samples or the frequencies are "
+            "not resolved."
+        )
+
+    # The covariance of the coefficients is the inverse normal matrix scaled by the variance of the residuals
+    degrees_of_freedom = max(len(time) - design_matrix.shape[1], 1)
+    if residuals.size == 0:
+        residuals = np.sum((channels - design_matrix @ coefficients) ** 2, axis=0)
+    variance = residuals / degrees_of_freedom
+    inverse_normal_matrix = np.linalg.inv(design_matrix.T @ design_matrix)
+
+    count = len(frequencies)
+    a, b, offset = coefficients[:count], coefficients[count : 2 * count], coefficients[-1]
+    diagonal = np.diag(inverse_normal_matrix)
+    var_a, var_b = np.outer(diagonal[:count], variance), np.outer(diagonal[count : 2 * count], variance)
+    cov_ab = np.outer(np.diag(inverse_normal_matrix[:count, count : 2 * count]), variance)
+    amplitude = np.hypot(a, b)
+    # Propagate the errors of a and b to the amplitude and phase
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amplitude_stderr = np.sqrt(a**2 * var_a + b**2 * var_b + 2 * a * b * cov_ab) / amplitude
+        phase_stderr = np.sqrt(b**2 * var_a + a**2 * var_b - 2 * a * b * cov_ab) / amplitude**2
+    # Shift the phase back to the original time axis
+    phase = np.angle(np.exp(1j * (np.arctan2(b, a) - 2 * np.pi * frequencies[:, np.newaxis] * time[0])))
+
+    return {
+        "amplitude": amplitude,
+        "phase": phase,
+        "offset": offset,
+        "amplitude_stderr": amplitude_stderr,
+        "phase_stderr": phase_stderr,
+        "offset_stderr": np.sqrt(diagonal[-1] * variance),
+    }
+
+
+def fit_sine(time, channels, frequency):
+    """
+    Fits ampl * sin(2 pi frequency * t + phi) + offset to each column of `channels`, which is an array of shape (N,) or
+    (N, channels). Returns a dict of arrays with one entry per channel: "amplitude", "phase", "offset" and their
+    standard errors "amplitude_stderr", "phase_stderr", "offset_stderr". The amplitude is positive and the phase is in
+    (-pi, pi].
+    """
+    fit = fit_sines(time, channels, [frequency])
+    return {key: value[0] if key.startswith(("amplitude", "phase")) else value for key, value in fit.items()}
@@ -0,0 +1,104 @@
+"""
+Timing analysis of logic analyzer captures. The channels D0-D7 are packed into one uint8 per sample, bit n holding
+channel Dn, which takes an eighth of the memory of a bool per channel. All functions work on the packed array using
+vectorized differences, so even captures with hundreds of millions of samples are analyzed in a fraction of a second.
+The time of an edge is the midpoint between the last sample before and the first sample after the transition. The
+`time` argument is either an array with the time of each sample or the sample interval.
+"""
+import numpy as np
+import pandas as pd
+
+CHANNELS = tuple(f"D{bit}" for bit in range(8))
+
+
+def pack(channels):
+    """
+    Packs an array of shape (N, 8) or a DataFrame with the columns D0-D7 into a uint8 array of length N. Missing
+    channels are 0.
+    """
+    if isinstance(channels, pd.DataFrame):
+        bits = np.zeros((len(channels), len(CHANNELS)), dtype=bool)
+        for bit, name in enumerate(CHANNELS):
+            if name in channels:
+                bits[:, bit] = channels[name].to_numpy() != 0
+    else:
+        bits = np.asarray(channels) != 0
+    return np.packbits(bits, axis=1, bitorder="little")[:, 0]
+
+
+def unpack(packed, channel):
+    """
+    Returns the samples of a channel, given by number or name, as uint8 array of 0 and 1.
+    """
+    bit = CHANNELS.index(channel) if isinstance(channel, str) else channel
+    return (np.asarray(packed) >> bit) & 1
+
+
+def _edge_times(indices, time):
+    # The edge lies between the samples indices - 1 and indices
+    if np.isscalar(time):
+        return (indices - 0.5) * time
+    time = np.asarray(time)
+    return (time[indices - 1] + time[indices]) / 2
+
+
+def edges(packed, channel, time=1):
+    """
+    Returns the times of the rising and the falling edges of a channel.
+    """
+    bits = unpack(packed, channel)
+    indices = np.flatnonzero(bits[1:] != bits[:-1]) + 1
+    rising = bits[indices] == 1
+    return _edge_times(indices[rising], time), _edge_times(indices[~rising], time)
+
+
+def pulse_widths(packed, channel, time=1, level=1):
+    """
+    Returns the durations of the complete high (level=1) or low (level=0) pulses of a channel.
+    """
+    rising, falling = edges(packed, channel, time)
+    starts, ends = (rising, falling) if level else (falling, rising)
+    # Drop a pulse, that is already in progress at the start of the capture
+    ends = ends[ends > starts[0]] if len(starts) else ends
+    count = min(len(starts), len(ends))
+    return ends[:count] - starts[:count]
+
+
+def periods(packed, channel, time=1):
+    """
+    Returns the time between successive rising edges of a channel.
+    """
+    return np.diff(edges(packed, channel, time)[0])
+
+
+def skew(packed, reference, channel, time=1):
+    """
+    Returns the time from each rising edge of the reference channel to the nearest rising edge of the other channel.
+    """
+    reference_edges, channel_edges = edges(packed, reference, time)[0], edges(packed, channel, time)[0]
+    if len(reference_edges) == 0 or len(channel_edges) == 0:
+        return np.empty(0)
+    position = np.clip(np.searchsorted(channel_edges, reference_edges), 1, len(channel_edges) - 1)
+    before, after = channel_edges[position - 1], channel_edges[position]
+    nearest = np.where(np.abs(reference_edges - before) <= np.abs(after - reference_edges), before, after)
+    return nearest - reference_edges
+
+
+def summary(packed, time=1):
+    """
+    Returns the edge count, frequency, duty cycle and period jitter of each channel with edges.
+    """
+    changed = np.bitwise_or.reduce(packed[1:] ^ packed[:-1]) if len(packed) > 1 else 0
+    rows = {}
+    for bit, name in enumerate(CHANNELS):
+        if not changed & (1 << bit):
+            continue  # The channel does not toggle
+        channel_periods = periods(packed, bit, time)
+        high = pulse_widths(packed, bit, time, level=1)
+        rows[name] = {
+            "edges": sum(len(channel_edges) for channel_edges in edges(packed, bit, time)),
+            "frequency": 1 / channel_periods.mean() if len(channel_periods) else np.nan,
+            "duty_cycle": high.mean() / channel_periods.mean() if len(channel_periods) and len(high) else np.nan,
+            "period_jitter": channel_periods.std() if len(channel_periods) else np.nan,
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
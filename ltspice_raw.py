@@ -0,0 +1,140 @@
+"""
+A reader for the binary .raw files written by LTspice. The data block is memory-mapped and each variable is exposed as a
+zero-copy numpy view, so that even large Monte Carlo runs (.step) can be loaded without exporting them to text first.
+Only the variables and steps used are ever read from disk.
+Supported are real (transient, DC sweep) and complex (AC) analyses, the "double" and "fastaccess" layouts and stepped
+runs. Zipped .raw files are decompressed into memory instead.
+"""
+import mmap
+
+import numpy as np
+
+import csv_reader
+
+
+def _find_data(buffer):
+    """
+    Returns the decoded header and the offset of the data block. LTspice writes the header in UTF-16LE, other
+    simulators in ASCII.
+    """
+    encoding = "utf-16-le" if buffer[1:2] == b"\x00" else "latin-1"
+    marker = "Binary:\n".encode(encoding)
+    end = buffer.find(marker)
+    if end < 0:
+        if buffer.find("Values:\n".encode(encoding)) >= 0:
+            raise ValueError("ASCII .raw files are not supported. Save the simulation in the binary format.")
+        raise ValueError("Invalid .raw file: no data block found.")
+    return bytes(buffer[:end]).decode(encoding), end + len(marker)
+
+
+def _parse_header(text):
+    header, variables = {}, []
+    lines = iter(text.replace("\r\n", "\n").splitlines())
+    for line in lines:
+        key, _, value = line.partition(":")
+        if key == "Variables":
+            break
+        header[key.strip()] = value.strip()
+    for line in lines:
+        # Each variable is described by a line like '\t1\tV(out)\tvoltage'
+        fields = line.split()
+        if len(fields) >= 3:
+            variables.append((fields[1], fields[2]))
+    return header, variables
+
+
+class RawFile:
+    """
+    A binary LTspice .raw file. The variables can be accessed by name, e.g. raw["V(out)"], or per step using
+    raw.get("V(out)", step=2).
+    """
+
+    def __init__(self, filename):
+        if filename.lower().endswith(csv_reader.COMPRESSED_EXTENSIONS):
+            buffer = csv_reader.read_bytes(filename)
+        else:
+            with open(filename, "rb") as file:
+                # The map stays open as long as there are views into it
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        text, data_offset = _find_data(buffer)
+        self.header, variables = _parse_header(text)
+        self.variables = [name for name, _ in variables]
+        self.variable_types = dict(variables)
+        self.flags = set(self.header.get("Flags", "").split())
+        self.plotname = self.header.get("Plotname", "")
+        self.is_complex = "complex" in self.flags
+        number_of_points = int(self.header["No. Points"])
+        if len(self.variables) != int(self.header["No. Variables"]):
+            raise ValueError("Invalid .raw file: the number of variables does not match the header.")
+
+        # Complex data is stored as pairs of doubles. Real data uses doubles for the axis and floats for the other
+        # variables, unless the "double" flag is set.
+        if self.is_complex:
+            dtypes = [np.dtype("<c16")] * len(self.variables)
+        elif "double" in self.flags:
+            dtypes = [np.dtype("<f8")] * len(self.variables)
+        else:
+            dtypes = [np.dtype("<f8")] + [np.dtype("<f4")] * (len(self.variables) - 1)
+
+        expected_size = data_offset + number_of_points * sum(dtype.itemsize for dtype in dtypes)
+        if len(buffer) < expected_size:
+            raise ValueError(f"Invalid .raw file: expected {expected_size} bytes, found {len(buffer)}.")
+
+        self._views = {}
+        if "fastaccess" in self.flags:
+            # The data is stored by variable, each one is a contiguous array
+            offset = data_offset
+            for name, dtype in zip(self.variables, dtypes):
+                self._views[name] = np.ndarray((number_of_points,), dtype=dtype, buffer=buffer, offset=offset)
+                offset += number_of_points * dtype.itemsize
+        else:
+            # The data is stored by point, so each variable is a strided view into the records
+            record = np.dtype({"names": self.variables, "formats": dtypes})
+            records = np.ndarray((number_of_points,), dtype=record, buffer=buffer, offset=data_offset)
+            self._views = {name: records[name] for name in self.variables}
+
+        self._axis = None
+        self.steps = self._find_steps()
+
+    @property
+    def axis_name(self):
+        return self.variables[0]
+
+    def axis(self):
+        """
+        Returns the time or frequency axis as a real array. This is a copy, because LTspice uses the sign bit of the
+        time as a flag.
+        """
+        if self._axis is None:
+            values = self._views[self.axis_name]
+            self._axis = values.real.copy() if self.is_complex else np.abs(values)
+        return self._axis
+
+    def _find_steps(self):
+        # Each step restarts the sweep, so the axis decreases at the start of a new step
+        if "stepped" not in self.flags or len(self._views[self.axis_name]) == 0:
+            return [slice(0, len(self._views[self.axis_name]))]
+        starts = np.flatnonzero(np.diff(self.axis()) < 0) + 1
+        bounds = [0, *starts.tolist(), len(self._views[self.axis_name])]
+        return [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def _resolve(self, name):
+        # LTspice does not distinguish between upper and lower case names
+        if name in self._views:
+            return name
+        names = {variable.lower(): variable for variable in self.variables}
+        if name.lower() not in names:
+            raise KeyError(f"Unknown variable '{name}'. Available variables: {', '.join(self.variables)}")
+        return names[name.lower()]
+
+    def __getitem__(self, name):
+        return self._views[self._resolve(name)]
+
+    def get(self, name, step=None):
+        """
+        Returns a view of the values of a variable, of all steps or only of the given step (starting at 0).
+        """
+        name = self._resolve(name)
+        values = self.axis() if name == self.axis_name else self._views[name]
+        return values if step is None else values[self.steps[step]]
@@ -0,0 +1,123 @@
+"""
+Robust outlier rejection for the logs. The filter is enabled by the "remove_outliers" option of a file:
+    "remove_outliers": {"method": "hampel", "sigma": 3, "window": 101, "columns": ["value"]}
+  "method":
+    "sigma_clip": Removes the points beyond `sigma` standard deviations from the mean and repeats this for at most
+      `iterations` passes (default 1) or until no more points are removed (None).
+    "mad": Like sigma clipping, but the median and the median absolute deviation (MAD) estimate the center and the
+      spread, so that the spikes themselves do not inflate the threshold. A single pass is sufficient.
+    "hampel": The MAD filter applied to a rolling window. Use this for drifting signals.
+  "sigma": The threshold in standard deviations. The MAD is scaled to the standard deviation of a normal distribution.
+  "window": Calculate the statistics over a centered rolling window instead of the whole log. Either the number of
+    samples or a time span like "10min", if the log has a date column. Required by the Hampel filter.
+  "columns": The columns to filter, defaults to "value" or all numeric columns if there is none. A row is removed if
+    any of its columns is an outlier or invalid (NaN), e.g. a masked overflow reading.
+The filter runs in the scaling step of the parsers, before the scaling, on the whole file. The columns are the parsed
+columns, including the outputs of the "sensors" option, but not the columns added by the scaling. The date range of a
+file with this option is not pushed down into the parser, so the statistics do not depend on the crop.
+The rolling statistics use the windowed order statistics of pandas, which update the window incrementally instead of
+sorting every window, so the filters scale with the length of the log, not with the product of log and window length.
+"""
+import numpy as np
+import pandas as pd
+
+MAD_TO_SIGMA = 1.482602218505602  # 1 / Phi^-1(3/4) scales the MAD to the standard deviation of a normal distribution
+
+
+def _rolling(values, window, dates):
+    # Time based windows require a DatetimeIndex
+    if isinstance(window, str):
+        values = pd.Series(values.to_numpy(), index=pd.DatetimeIndex(dates))
+    return values.rolling(window, center=True, min_periods=1)
+
+
+def sigma_clip(values, sigma=3, iterations=1, window=None, dates=None):
+    """
+    Returns a boolean array, that is True for the outliers of `values`. Each pass removes the points beyond `sigma`
+    standard deviations from the mean of the remaining points and reports how many it removed.
+    """
+    is_outlier = np.zeros(len(values), dtype=bool)
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        iteration += 1
+        remaining = values.where(~is_outlier)
+        if window is None:
+            mean, std = remaining.mean(), remaining.std()
+        else:
+            rolling = _rolling(remaining, window, dates)
+            mean, std = rolling.mean().to_numpy(), rolling.std().to_numpy()
+        new_outliers = ~is_outlier & (np.abs(values.to_numpy() - mean) > sigma * std)
+        print(f"    Pass {iteration}: removed {new_outliers.sum()} points beyond {sigma}σ (σ = {np.nanmean(std)})")
+        if not new_outliers.any():
+            break
+        is_outlier |= new_outliers
+    return is_outlier
+
+
+def mad_filter(values, sigma=3, window=None, dates=None):
+    """
+    Returns a boolean array, that is True for the points of `values` beyond `sigma` robust standard deviations from the
+    median. The robust standard deviation is the scaled median absolute deviation.
+    """
+    if window is None:
+        median = values.median()
+        deviation = np.abs(values.to_numpy() - median)
+        spread = MAD_TO_SIGMA * np.nanmedian(deviation)
+    else:
+        # The Hampel filter. The MAD is approximated by the rolling median of the deviations from the rolling median.
+        median = _rolling(values, window, dates).median().to_numpy()
+        deviation = np.abs(values.to_numpy() - median)
+        spread = MAD_TO_SIGMA * _rolling(pd.Series(deviation, index=values.index), window, dates).median().to_numpy()
+    return deviation > sigma * spread
+
+
+def hampel_filter(values, window, sigma=3, dates=None):
+    """
+    Returns a boolean array, that is True for the points of `values`, that deviate more than `sigma` robust standard
+    deviations from the median of the surrounding window.
+    """
+    return mad_filter(values, sigma=sigma, window=window, dates=dates)
+
+
+def filter_columns(data, settings):
+    """
+    Returns the columns filtered by remove_outliers().
+    """
+    if "columns" in settings:
+        return list(settings["columns"])
+    if "value" in data:
+        return ["value"]
+    return [column for column in data if column != "date" and pd.api.types.is_numeric_dtype(data[column])]
+
+
+def remove_outliers(data, settings):
+    """
+    Returns the rows of `data`, that are no outliers according to the "remove_outliers" `settings`.
+    """
+    method = settings.get("method", "sigma_clip")
+    sigma, window = settings.get("sigma", 3), settings.get("window")
+    dates = data["date"] if "date" in data else None
+    if isinstance(window, str) and dates is None:
+        raise ValueError("Time based outlier windows require a date column.")
+
+    columns = filter_columns(data, settings)
+    missing_columns = [column for column in columns if column not in data]
+    if missing_columns:
+        raise KeyError(f"Cannot remove the outliers of the missing columns {missing_columns}.")
+
+    # The invalid readings are removed as well, like the former filter of the LM399 logs did
+    is_outlier = data[columns].isna().any(axis=1).to_numpy(copy=True)
+    for column in columns:
+        if method == "sigma_clip":
+            is_outlier |= sigma_clip(data[column], sigma, settings.get("iterations", 1), window, dates)
+        elif method == "mad":
+            is_outlier |= mad_filter(data[column], sigma, window, dates)
+        elif method == "hampel":
+            if window is None:
+                raise ValueError("The Hampel filter requires a window.")
+            is_outlier |= hampel_filter(data[column], window, sigma, dates)
+        else:
+            raise ValueError(f"Unknown outlier method '{method}'. Use 'sigma_clip', 'mad' or 'hampel'.")
+
+    print(f"  Removed {is_outlier.sum()} of {len(is_outlier)} rows as outliers of {', '.join(columns)} ({method})")
+    return data[~is_outlier]
@@ -3,16 +3,21 @@ import argparse
 import glob
 import importlib
 
-import allantools
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import os
-import seaborn as sns
 
 from file_parser import parse_file
+import shared_frames
+import validity
+from lazy_import import lazy_import
+from worker_pool import POOL_TYPES, map_ordered
+
+# Importing these modules takes seconds, so they are only loaded when used
+allantools = lazy_import("allantools")
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
 
-colors = sns.color_palette("colorblind")
 __version__ = "0.9.0"
 
 # Use these settings for the PhD thesis
@@ -42,7 +47,6 @@ tex_fonts = {
     ),
     "savefig.directory": os.path.dirname(os.path.realpath(__file__)),
 }
-plt.rcParams.update(tex_fonts)
 # plt.style.use('tableau-colorblind10')
 # plt.style.use('seaborn-colorblind')
 # sns.set_theme()
@@ -76,13 +80,23 @@ def noise_gen(noise_type="white", amplitude=1, N=1e5):
     return tod
 
 
-def load_data(plot_file):
+def load_data(plot_file, columns=None, date_range=None):
     print(f"  Parsing: '{plot_file['filename']}'...")
-    data = parse_file(**plot_file)
+    data = parse_file(**plot_file, columns=columns, date_range=date_range)
 
     return data
 
 
+def get_required_columns(plot):
+    # The parsers only need to read the columns used by the plot. The date is required to calculate the sample rate.
+    return {"date", *plot["primary_axis"]["columns_to_plot"]}
+
+
+def get_date_range(plot):
+    # Only the rows inside the zoom window need to be parsed
+    return plot.get("zoom")
+
+
 def crop_data(data, zoom_date=None, crop_secondary=None):
     if zoom_date is not None:
         index_to_drop = data[(data.date < zoom_date[0]) | (data.date > zoom_date[1])].index
@@ -102,7 +116,7 @@ def process_data(data, columns, plot_type):
         if column in data:
             print(f"    Calculating ADEV for {column}.")
             (tau, adev, adev_error, n) = allantools.totdev(
-                data[column].values, data_type="freq", rate=sample_rate
+                validity.valid_values(data, column), data_type="freq", rate=sample_rate
             )  # , taus="all")
             #(tau, adev, adev_error, n) = allantools.oadev(
             #    data[column].values, data_type="freq", rate=sample_rate, taus="all"
@@ -139,13 +153,22 @@ def plot_data(ax, data, column_settings):
         ax.loglog(data.tau, data[column], marker="", alpha=0.7, **settings)
 
 
-def plot_series(plot, show_plot_window):
+def plot_series(plot, show_plot_window, jobs=None, pool="process"):
     if not plot.get("show", True):
         return
     print(f"Plotting {plot['description']}")
     # Load the data to be plotted
     plot_files = (plot_file for plot_file in plot["files"] if plot_file.get("show", True))
-    data_files = [load_data(plot_file)[0] for plot_file in plot_files]
+    columns = get_required_columns(plot)
+    date_range = get_date_range(plot)
+    results = map_ordered(
+        lambda plot_file: load_data(plot_file, columns, date_range),
+        plot_files,
+        jobs=jobs,
+        pool=pool,
+        group_by=lambda plot_file: plot_file["filename"],
+    )
+    data_files = [result[0] for result in results]
 
     # If we have something to plot, proceed
     if len(data_files) > 0:
@@ -218,11 +241,19 @@ if __name__ == "__main__":
         parser.add_argument("-v", "--version", action="version", version=f"{parser.prog} version {__version__}")
         parser.add_argument("plotfile", help="One or more yaml configurations to plot.")
         parser.add_argument("--silent", action="store_true", help="Do not show the plot when set.")
+        parser.add_argument(
+            "-j", "--jobs", type=int, help="Number of files loaded in parallel. Defaults to the number of CPUs."
+        )
+        parser.add_argument(
+            "--pool", choices=POOL_TYPES, default="process", help="Load the files using processes or threads."
+        )
 
         return parser
 
     parser = init_argparse()
     args = parser.parse_args()
+    # Apply the settings only now, so that --version does not import pyplot
+    plt.rcParams.update(tex_fonts)
     plot_files = glob.glob(args.plotfile)
     for file_path in plot_files:
         module_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -230,6 +261,9 @@ if __name__ == "__main__":
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
         try:
-            plot_series(plot=module.plot, show_plot_window=not args.silent)
+            plot_series(plot=module.plot, show_plot_window=not args.silent, jobs=args.jobs, pool=args.pool)
         except FileNotFoundError as exc:
             print(f"  Data file not found. Cannot plot graph: {exc}")
+        finally:
+            # The data loaded by the workers is no longer needed, once the figure is saved
+            shared_frames.release()
@@ -4,16 +4,20 @@ import glob
 import importlib
 
 import matplotlib
-import matplotlib.pyplot as plt
-import matplotlib.legend
 import numpy as np
 import os
 import pandas as pd
 from matplotlib.ticker import ScalarFormatter
-from scipy import integrate
-import seaborn as sns
 
 from file_parser import parse_file
+import shared_frames
+from lazy_import import lazy_import
+from worker_pool import POOL_TYPES, map_ordered
+
+# Importing these modules takes seconds, so they are only loaded when used
+plt = lazy_import("matplotlib.pyplot")
+integrate = lazy_import("scipy.integrate")
+sns = lazy_import("seaborn")
 
 __version__ = "0.9.0"
 
@@ -51,8 +55,6 @@ tex_fonts = {
     ),
     "savefig.directory": os.path.dirname(os.path.realpath(__file__)),
 }
-plt.rcParams.update(tex_fonts)
-plt.style.use("tableau-colorblind10")
 # end of settings
 
 
@@ -98,13 +100,23 @@ def make_format(current, other):
     return format_coord
 
 
-def load_data(plot_file):
+def load_data(plot_file, columns=None):
     print(f"  Parsing: '{plot_file['filename']}'...")
-    data = parse_file(**plot_file)
+    data = parse_file(**plot_file, columns=columns)
 
     return data
 
 
+def get_required_columns(plot):
+    # The parsers only need to read the columns used by the plot
+    columns = {plot["primary_axis"]["x-axis"], *plot["primary_axis"]["columns_to_plot"]}
+    if plot.get("secondary_axis", {}).get("show", False):
+        columns |= set(plot["secondary_axis"]["columns_to_plot"])
+    if plot.get("crop", {}).get("crop_index") is not None:
+        columns.add(plot["crop"]["crop_index"])
+    return columns
+
+
 def crop_data(data, crop_index=None, crop=None):
     if crop_index is not None:
         index_to_drop = (
@@ -191,13 +203,21 @@ def integrate_data(data, x_axis, column_settings):
             )
 
 
-def plot_series(plot, show_plot_window):
+def plot_series(plot, show_plot_window, jobs=None, pool="process"):
     if not plot.get("show", True):
         return
     print(f"Plotting {plot['description']}")
     # Load the data to be plotted
     plot_files = (plot_file for plot_file in plot["files"] if plot_file.get("show", True))
-    data = pd.concat((load_data(plot_file)[0] for plot_file in plot_files), sort=True)
+    columns = get_required_columns(plot)
+    results = map_ordered(
+        lambda plot_file: load_data(plot_file, columns),
+        plot_files,
+        jobs=jobs,
+        pool=pool,
+        group_by=lambda plot_file: plot_file["filename"],
+    )
+    data = pd.concat((result[0] for result in results), sort=True)
 
     # If we have something to plot, proceed
     if not data.empty:
@@ -255,6 +275,12 @@ def init_argparse() -> argparse.ArgumentParser:
     parser.add_argument("-v", "--version", action="version", version=f"{parser.prog} version {__version__}")
     parser.add_argument("plotfile", help="One or more yaml configurations to plot.")
     parser.add_argument("--silent", action="store_true", help="Do not show the plot when set.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="Number of files loaded in parallel. Defaults to the number of CPUs."
+    )
+    parser.add_argument(
+        "--pool", choices=POOL_TYPES, default="process", help="Load the files using processes or threads."
+    )
 
     return parser
 
@@ -262,6 +288,9 @@ def init_argparse() -> argparse.ArgumentParser:
 if __name__ == "__main__":
     parser = init_argparse()
     args = parser.parse_args()
+    # Apply the settings only now, so that --version does not import pyplot
+    plt.rcParams.update(tex_fonts)
+    plt.style.use("tableau-colorblind10")
     plot_files = glob.glob(args.plotfile)
     for file_path in plot_files:
         module_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -269,6 +298,9 @@ if __name__ == "__main__":
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
         try:
-            plot_series(plot=module.plot, show_plot_window=not args.silent)
+            plot_series(plot=module.plot, show_plot_window=not args.silent, jobs=args.jobs, pool=args.pool)
         except FileNotFoundError as exc:
             print(f"  Data file not found. Cannot plot graph: {exc}")
+        finally:
+            # The data loaded by the workers is no longer needed, once the figure is saved
+            shared_frames.release()
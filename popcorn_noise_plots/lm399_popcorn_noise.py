@@ -1,6 +1,7 @@
-import pandas as pd
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind", 11)
 phi = (5**0.5 - 1) / 2  # golden ratio
 plot = {
@@ -50,7 +51,7 @@ plot = {
             "options": {
                 "columns": {0: "date", 1: "k2002_ch1", 9: "k2002_ch9", 10: "k2002_ch10"},
                 "scaling": {
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "date": lambda data: parse_dates(data.date),
                 },
             },
         },
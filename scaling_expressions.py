@@ -0,0 +1,269 @@
+"""
+The scaling of the parsed columns. The "scaling" option of a file maps the output columns to either a function or a
+string expression over the column names:
+    "scaling": {
+        "value": "adc_code / (2**31 - 1) * 4.096 / 50e-6",
+        "value_ext": "value_ext - mean(value_ext)",
+        "setpoint": "0",  # A constant line
+        "dmm": "`3458a` * 1e6",  # Column names, that are no identifiers, are quoted by backticks
+    }
+The expressions support numbers, column names, the arithmetic operators, comparisons combined by & and |, the
+elementwise FUNCTIONS, where(condition, x, y) and the REDUCTIONS, which ignore NaNs and return a scalar.
+They are compiled once and evaluated with numexpr if it is installed. Otherwise the numpy ufuncs write into a single
+output array, so that a chain of operations like "a / b * c - d" does not allocate a new temporary for each step.
+Functions are the fallback for everything else. Depending on the parser, they are called with the DataFrame or with the
+column to scale, see apply_scaling().
+"""
+import ast
+import functools
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+# The operators and functions supported by both numexpr and numpy
+BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Mod: np.remainder,
+    ast.Pow: np.power,
+    ast.BitAnd: np.logical_and,
+    ast.BitOr: np.logical_or,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+SCALAR_OPERATORS = {
+    np.add: operator.add,
+    np.subtract: operator.sub,
+    np.multiply: operator.mul,
+    np.true_divide: operator.truediv,
+    np.remainder: operator.mod,
+    np.power: operator.pow,
+}
+FUNCTIONS = {
+    name: getattr(np, name)
+    for name in (
+        "abs",
+        "sqrt",
+        "exp",
+        "expm1",
+        "log",
+        "log10",
+        "log1p",
+        "sin",
+        "cos",
+        "tan",
+        "arcsin",
+        "arccos",
+        "arctan",
+        "sinh",
+        "cosh",
+        "tanh",
+    )
+}
+REDUCTIONS = {
+    "mean": np.nanmean,
+    "median": np.nanmedian,
+    "std": functools.partial(np.nanstd, ddof=1),  # Like pandas
+    "min": np.nanmin,
+    "max": np.nanmax,
+}
+BOOLEAN_OPERATORS = (
+    np.logical_and,
+    np.logical_or,
+    np.less,
+    np.less_equal,
+    np.greater,
+    np.greater_equal,
+    np.equal,
+    np.not_equal,
+)
+# Like ndarray.__pow__(), which is much faster than np.power() for these exponents
+FAST_POWERS = {2: np.square, 0.5: np.sqrt}
+QUOTED_COLUMN_REGEX = re.compile(r"`([^`]+)`")
+
+
+@functools.lru_cache(maxsize=None)
+def _has_numexpr():
+    try:
+        import numexpr  # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        return False
+    return True
+
+
+def _validate(node, source):
+    # Only allow the syntax, that can be evaluated by both numexpr and numpy
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            raise ValueError(f"Unsupported constant {node.value!r} in the scaling expression '{source}'.")
+    elif isinstance(node, ast.BinOp):
+        if type(node.op) not in BINARY_OPERATORS:
+            raise ValueError(f"Unsupported operator {type(node.op).__name__} in the scaling expression '{source}'.")
+    elif isinstance(node, ast.Compare):
+        if len(node.ops) != 1 or type(node.ops[0]) not in BINARY_OPERATORS:
+            raise ValueError(f"Unsupported comparison in the scaling expression '{source}'. Combine them by & or |.")
+    elif isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, (ast.USub, ast.UAdd)):
+            raise ValueError(f"Unsupported operator {type(node.op).__name__} in the scaling expression '{source}'.")
+    elif isinstance(node, ast.Call):
+        name = getattr(node.func, "id", None)
+        if (name not in FUNCTIONS and name not in REDUCTIONS and name != "where") or node.keywords:
+            raise ValueError(f"Unsupported function {ast.unparse(node.func)} in the scaling expression '{source}'.")
+        if len(node.args) != (3 if name == "where" else 1):
+            raise ValueError(f"Wrong number of arguments of {name}() in the scaling expression '{source}'.")
+        if name in REDUCTIONS and not isinstance(node.args[0], ast.Name):
+            raise ValueError(f"The argument of {name}() must be a column in the scaling expression '{source}'.")
+    elif not isinstance(node, (ast.Name, ast.Load, ast.operator, ast.cmpop, ast.unaryop)):
+        raise ValueError(f"Unsupported syntax {type(node).__name__} in the scaling expression '{source}'.")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_expression(source):
+    """
+    Returns the parsed scaling expression `source` and the names of the columns it references. The column names are
+    replaced by the placeholders _c0, _c1, ... and the reductions by _r0, _r1, ... which are evaluated first.
+    """
+    names = []
+
+    def quote(match):
+        names.append(match.group(1))
+        return f"_c{len(names) - 1}"
+
+    tree = ast.parse(QUOTED_COLUMN_REGEX.sub(quote, source).strip(), mode="eval").body
+    for node in ast.walk(tree):
+        _validate(node, source)
+
+    class Placeholders(ast.NodeTransformer):
+        # Replace the column names and reductions, so that numexpr sees plain variables
+        def visit_Name(self, node):  # pylint: disable=invalid-name
+            if node.id.startswith("_c") and node.id[2:].isdigit():
+                return node
+            if node.id not in names:
+                names.append(node.id)
+            return ast.Name(id=f"_c{names.index(node.id)}", ctx=ast.Load())
+
+        def visit_Call(self, node):  # pylint: disable=invalid-name
+            if node.func.id in REDUCTIONS:
+                reductions.append((REDUCTIONS[node.func.id], self.visit(node.args[0]).id))
+                return ast.Name(id=f"_r{len(reductions) - 1}", ctx=ast.Load())
+            node.args = [self.visit(argument) for argument in node.args]
+            return node
+
+    reductions = []
+    tree = Placeholders().visit(tree)
+    return tree, tuple(names), tuple(reductions), ast.unparse(tree)
+
+
+def expression_columns(source):
+    """
+    Returns the names of the columns referenced by the scaling expression `source`.
+    """
+    return frozenset(compile_expression(source)[1])
+
+
+def is_row_local(source):
+    """
+    Returns True if the value of a row only depends on the same row, i.e. the expression has no reductions.
+    """
+    return not compile_expression(source)[2]
+
+
+def _is_owned(value, temporaries):
+    return isinstance(value, np.ndarray) and temporaries.get(id(value)) is value
+
+
+def _evaluate(node, variables, temporaries):
+    # Returns a scalar or an array. The arrays allocated here are kept in `temporaries` by their id and reused as
+    # output buffers.
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        return variables[node.id]
+    if isinstance(node, ast.UnaryOp):
+        value = _evaluate(node.operand, variables, temporaries)
+        if isinstance(node.op, ast.UAdd) or np.isscalar(value):
+            return -value if isinstance(node.op, ast.USub) else value
+        return _apply(np.negative, (value,), temporaries)
+    if isinstance(node, (ast.BinOp, ast.Compare)):
+        function = BINARY_OPERATORS[type(node.op if isinstance(node, ast.BinOp) else node.ops[0])]
+        right_node = node.right if isinstance(node, ast.BinOp) else node.comparators[0]
+        left, right = _evaluate(node.left, variables, temporaries), _evaluate(right_node, variables, temporaries)
+        if np.isscalar(left) and np.isscalar(right) and function in SCALAR_OPERATORS:
+            return SCALAR_OPERATORS[function](left, right)  # Constant folding, e.g. 2**31 - 1
+        if function is np.power and np.isscalar(right):
+            if right in FAST_POWERS:
+                return _apply(FAST_POWERS[right], (left,), temporaries)
+            if left.dtype.kind == "f":
+                right = float(right)  # Integer exponents take a slow path in np.power()
+        return _apply(function, (left, right), temporaries)
+    arguments = [_evaluate(argument, variables, temporaries) for argument in node.args]
+    if node.func.id == "where":
+        result = np.where(*arguments)
+        temporaries[id(result)] = result
+        return result
+    return _apply(FUNCTIONS[node.func.id], arguments, temporaries)
+
+
+def _apply(ufunc, arguments, temporaries):
+    # Write the result into a temporary argument if it has the right dtype
+    dtype = np.result_type(*arguments) if ufunc is not np.true_divide else np.result_type(*arguments, 1.0)
+    if ufunc in BOOLEAN_OPERATORS:
+        dtype = np.dtype(bool)
+    for argument in arguments:
+        if _is_owned(argument, temporaries) and argument.dtype == dtype:
+            return ufunc(*arguments, out=argument)
+    result = ufunc(*arguments)
+    temporaries[id(result)] = result
+    return result
+
+
+def evaluate_expression(source, data):
+    """
+    Returns the values of the scaling expression `source` over the columns of the DataFrame `data` as an array.
+    """
+    tree, names, reductions, numexpr_source = compile_expression(source)
+    missing_columns = [name for name in names if name not in data]
+    if missing_columns:
+        raise KeyError(f"The scaling expression '{source}' references the missing columns {missing_columns}.")
+    variables = {f"_c{i}": data[name].to_numpy() for i, name in enumerate(names)}
+    for i, (reduction, argument) in enumerate(reductions):
+        variables[f"_r{i}"] = reduction(variables[argument].astype(np.float64, copy=False))
+
+    if names and _has_numexpr():
+        import numexpr  # pylint: disable=import-outside-toplevel
+
+        result = numexpr.evaluate(numexpr_source, local_dict=variables)
+    else:
+        temporaries = {}
+        result = _evaluate(tree, variables, temporaries)
+        if not _is_owned(result, temporaries):
+            result = np.array(result)  # A copy of a column or a scalar
+    if result.ndim == 0:
+        result = np.full(len(data), result[()])
+    return result
+
+
+def apply_scaling(data, scaling_functions, mode="frame", existing_only=False):
+    """
+    Adds the columns defined by the "scaling" option to `data`. Expressions are always evaluated over the DataFrame.
+    Functions are called with the DataFrame or, if `mode` is "column", with the column to scale, which is skipped if it
+    is missing. `existing_only` skips the functions of missing columns in the "frame" mode as well.
+    """
+    for key, scaling_function in scaling_functions.items():
+        if isinstance(scaling_function, str):
+            # Wrap the result in a Series, otherwise pandas copies the array
+            data[key] = pd.Series(evaluate_expression(scaling_function, data), index=data.index, copy=False)
+        elif mode == "column":
+            if key in data:
+                data[key] = scaling_function(data[key])
+        elif key in data or not existing_only:
+            data[key] = scaling_function(data)
+    return data
@@ -0,0 +1,191 @@
+"""
+Readers for the native binary waveform exports of the oscilloscopes. Exporting multi-million point captures to csv
+doubles their size and parsing the text dominates the load time. The binary formats are memory-mapped instead. The
+samples are kept in their raw format, e.g. 16 bit ADC codes, and are only converted to volts, when the values of a
+channel are requested. The time axis is synthesized from the trigger offset and the sample interval.
+Supported formats:
+  - Rohde & Schwarz .bin: An XML header file '<name>.bin' and the samples in '<name>.Wfm.bin' (RTH, RTB, RTM, RTO)
+  - Keysight Infiniium .bin (MSO9000)
+  - Keysight Infiniium .h5, requires h5py
+"""
+import mmap
+import os
+import struct
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+
+class Waveform:
+    """
+    A channel of a capture. `raw` is a view of the samples in the file, the values are raw * scale + offset.
+    """
+
+    def __init__(self, name, raw, scale, offset, t0, dt):
+        self.name, self.raw, self.scale, self.offset, self.t0, self.dt = name, raw, scale, offset, t0, dt
+
+    def __len__(self):
+        return len(self.raw)
+
+    def values(self, gain=1, dtype=np.float32):
+        """
+        Converts the samples to physical values divided by `gain`. Scale, offset and gain are applied in a single pass.
+        """
+        if self.scale == 1 and self.offset == 0 and gain == 1 and self.raw.dtype == dtype:
+            return self.raw
+        scale, offset = dtype(self.scale / gain), dtype(self.offset / gain)
+        values = self.raw.astype(dtype)
+        values *= scale
+        values += offset
+        return values
+
+    def time(self):
+        return self.t0 + np.arange(len(self.raw)) * self.dt
+
+
+def _map(filename):
+    with open(filename, "rb") as file:
+        # The map stays open as long as there are views into it
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# The sample formats of the R&S .Wfm.bin files
+RS_SIGNAL_FORMATS = {
+    "eRS_SIGNAL_FORMAT_FLOAT": np.dtype("<f4"),
+    "eRS_SIGNAL_FORMAT_INT8BIT": np.dtype("i1"),
+    "eRS_SIGNAL_FORMAT_INT16BIT": np.dtype("<i2"),
+}
+RS_DATA_HEADER_SIZE = 8  # The data file starts with the sample size and the record length (uint32 each)
+
+
+def _rs_filenames(filename):
+    # Accept both the header and the data file
+    base = filename[: -len(".Wfm.bin")] if filename.endswith(".Wfm.bin") else os.path.splitext(filename)[0]
+    return f"{base}.bin", f"{base}.Wfm.bin"
+
+
+def _rs_channel_values(properties, name, count):
+    # Multi-channel exports list the settings of each channel, single channel exports have a single value
+    values = properties.get(f"MultiChannel{name}", "").replace(",", " ").split()
+    return [float(value) for value in values[:count]] if len(values) >= count else [float(properties[name])] * count
+
+
+def read_rs_bin(filename, acquisition=0):
+    """
+    Returns a dict of the Waveforms of an R&S binary export. Multi-channel exports contain the channels interleaved.
+    """
+    header_filename, data_filename = _rs_filenames(filename)
+    properties = {element.get("Name"): element.get("Value") for element in ET.parse(header_filename).iter("Prop")}
+    signal_format = properties["SignalFormat"]
+    if signal_format not in RS_SIGNAL_FORMATS:
+        raise ValueError(f"Unsupported signal format '{signal_format}' in {header_filename}")
+    dtype = RS_SIGNAL_FORMATS[signal_format]
+    record_length = int(properties["SignalRecordLength"])
+    hardware_record_length = int(properties.get("SignalHardwareRecordLength", record_length))
+    leading_samples = int(properties.get("LeadingSettlingSamples", 0))
+    acquisitions = int(properties.get("NumberOfAcquisitions", 1))
+
+    buffer = _map(data_filename)
+    samples = (len(buffer) - RS_DATA_HEADER_SIZE) // dtype.itemsize
+    channels = max(samples // (hardware_record_length * acquisitions), 1)
+    data = np.ndarray(
+        (acquisitions, hardware_record_length, channels), dtype=dtype, buffer=buffer, offset=RS_DATA_HEADER_SIZE
+    )[acquisition, leading_samples : leading_samples + record_length]
+
+    if dtype.kind == "f":
+        scales, offsets = [1.0] * channels, [0.0] * channels
+    else:
+        # The ADC codes span the screen height
+        levels = float(properties.get("NofQuantisationLevels", 253 if dtype.itemsize == 1 else 64768))
+        divisions = float(properties.get("VerticalDivisionCount", 10))
+        scales = [scale * divisions / levels for scale in _rs_channel_values(properties, "VerticalScale", channels)]
+        offsets = [
+            offset - position * scale
+            for offset, position, scale in zip(
+                _rs_channel_values(properties, "VerticalOffset", channels),
+                _rs_channel_values(properties, "VerticalPosition", channels),
+                _rs_channel_values(properties, "VerticalScale", channels),
+            )
+        ]
+
+    t0, dt = float(properties["XStart"]), float(properties["Resolution"])
+    return {
+        f"CH{channel + 1}": Waveform(f"CH{channel + 1}", data[:, channel], scales[channel], offsets[channel], t0, dt)
+        for channel in range(channels)
+    }
+
+
+# The Keysight Infiniium .bin format, see the "Infiniium Oscilloscopes User's Guide"
+KEYSIGHT_FILE_HEADER = struct.Struct("<2s2sii")  # Cookie "AG", version, file size, number of waveforms
+KEYSIGHT_WAVEFORM_HEADER = struct.Struct("<iiiiifdddii16s16s24s16sdI")
+KEYSIGHT_BUFFER_HEADER = struct.Struct("<ihhi")  # Header size, buffer type, bytes per point, buffer size
+# Normal, maximum, minimum, counts and logic buffers
+KEYSIGHT_BUFFER_TYPES = {
+    1: np.dtype("<f4"),
+    2: np.dtype("<f4"),
+    3: np.dtype("<f4"),
+    4: np.dtype("<i4"),
+    5: np.dtype("u1"),
+}
+
+
+def read_keysight_bin(filename):
+    """
+    Returns a dict of the Waveforms of a Keysight Infiniium .bin file. The samples are stored as floats in volts.
+    """
+    buffer = _map(filename)
+    cookie, _, _, number_of_waveforms = KEYSIGHT_FILE_HEADER.unpack_from(buffer, 0)
+    if cookie != b"AG":
+        raise ValueError(f"Not a Keysight waveform file: {filename}")
+
+    waveforms = {}
+    position = KEYSIGHT_FILE_HEADER.size
+    for _ in range(number_of_waveforms):
+        header = KEYSIGHT_WAVEFORM_HEADER.unpack_from(buffer, position)
+        header_size, _, number_of_buffers, points = header[:4]
+        x_increment, x_origin = header[7], header[8]
+        label = header[14].split(b"\0")[0].decode("latin-1") or f"Waveform {len(waveforms) + 1}"
+        position += header_size
+        for buffer_index in range(number_of_buffers):
+            buffer_header_size, buffer_type, bytes_per_point, buffer_size = KEYSIGHT_BUFFER_HEADER.unpack_from(
+                buffer, position
+            )
+            position += buffer_header_size
+            dtype = KEYSIGHT_BUFFER_TYPES.get(buffer_type, np.dtype(f"u{bytes_per_point}"))
+            # Only the first buffer is used, the others contain the min/max values of peak detect captures
+            if buffer_index == 0:
+                raw = np.ndarray((buffer_size // dtype.itemsize,), dtype=dtype, buffer=buffer, offset=position)
+                waveforms[label] = Waveform(label, raw[:points], 1.0, 0.0, x_origin, x_increment)
+            position += buffer_size
+    return waveforms
+
+
+def read_keysight_h5(filename):
+    """
+    Returns a dict of the Waveforms of a Keysight Infiniium .h5 file. Contiguous datasets are memory-mapped, compressed
+    ones are read.
+    """
+    try:
+        import h5py  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError("Reading Keysight .h5 files requires h5py: pip install h5py") from exc
+
+    waveforms = {}
+    with h5py.File(filename, "r") as file:
+        for name, group in file["Waveforms"].items():
+            dataset = next(item for item in group.values() if isinstance(item, h5py.Dataset))
+            offset = dataset.id.get_offset()
+            if dataset.chunks is None and dataset.compression is None and offset is not None:
+                raw = np.memmap(filename, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape)
+            else:
+                raw = dataset[()]
+            attributes = group.attrs
+            waveforms[name] = Waveform(
+                name,
+                raw.reshape(-1)[: int(attributes.get("NumPoints", raw.size))],
+                float(attributes.get("YInc", 1)),
+                float(attributes.get("YOrg", 0)),
+                float(attributes.get("XOrg", 0)),
+                float(attributes["XInc"]),
+            )
+    return waveforms
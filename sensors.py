@@ -0,0 +1,230 @@
+"""
+Conversion of the resistance of thermistors and platinum resistance thermometers to temperature. The sensors are
+either named, see SENSORS, or given as a dict with the "model" and its coefficients:
+  "steinhart_hart": 1 / T = sum(coefficients[i] * ln(R / r_ref)**i). The classic form A + B ln(R) + C ln(R)^3 uses
+    r_ref = 1 and the coefficients (A, B, 0, C).
+  "beta": 1 / T = 1 / t_ref + ln(R / r_ref) / beta
+  "callendar_van_dusen": R = r0 * (1 + a t + b t^2 + c (t - 100 °C) t^3), with c = 0 above 0 °C (IEC 60751)
+  "its90": The ITS-90 reference functions of an SPRT with the resistance r_tpw at the triple point of water and the
+    deviation function coefficients a7, b7, c7 (0 °C to 660.323 °C) and a4, b4 (83.8058 K to 0 °C).
+The conversion can be enabled by the "sensors" option of a file, which maps the output columns to their settings. It
+runs before the "scaling", so that the scaling functions and expressions can use the temperatures:
+    "sensors": {"temperature": {"sensor": "DC95_10kY", "column": "adc_code", "scale": 4.096 / (2**31 - 1) / 50e-6}}
+  "column": The input column, it is converted to a resistance by R = column * scale + offset.
+  "unit": "C" (default) or "K".
+  "lookup_table": Evaluate the model on a uniform grid of this many points spanning the input and interpolate
+    linearly. This is faster for the costly models and long logs. True uses LOOKUP_TABLE_SIZE points.
+"""
+import numpy as np
+
+ZERO_CELSIUS = 273.15  # in K
+LOOKUP_TABLE_SIZE = 2**16
+
+SENSORS = {
+    # Amphenol DC95 thermistor, material type 10kY
+    "DC95_10kY": {
+        "model": "steinhart_hart",
+        "coefficients": (3.3540153e-3, 2.7867185e-4, 4.0006637e-6, 1.5575628e-7),
+        "r_ref": 10e3,
+    },
+    # Industrial platinum RTDs according to IEC 60751
+    "PT100": {"model": "callendar_van_dusen", "r0": 100.0},
+    "PT1000": {"model": "callendar_van_dusen", "r0": 1000.0},
+}
+
+# IEC 60751 coefficients
+CVD_A = 3.9083e-3
+CVD_B = -5.775e-7
+CVD_C = -4.183e-12
+
+# ITS-90 reference functions
+ITS90_A = (
+    -2.13534729,
+    3.18324720,
+    -1.80143597,
+    0.71727204,
+    0.50344027,
+    -0.61899395,
+    -0.05332322,
+    0.28021362,
+    0.10715224,
+    -0.29302865,
+    0.04459872,
+    0.11868632,
+    -0.05248134,
+)
+ITS90_B = (
+    0.183324722,
+    0.240975303,
+    0.209108771,
+    0.190439972,
+    0.142648498,
+    0.077993465,
+    0.012475611,
+    -0.032267127,
+    -0.075291522,
+    -0.056470670,
+    0.076201285,
+    0.123893204,
+    -0.029201193,
+    -0.091173542,
+    0.001317696,
+    0.026025526,
+)
+ITS90_C = (
+    2.78157254,
+    1.64650916,
+    -0.13714390,
+    -0.00649767,
+    -0.00234444,
+    0.00511868,
+    0.00187982,
+    -0.00204472,
+    -0.00046122,
+    0.00045724,
+)
+ITS90_D = (
+    439.932854,
+    472.418020,
+    37.684494,
+    7.472018,
+    2.920828,
+    0.005184,
+    -0.963864,
+    -0.188732,
+    0.191203,
+    0.049025,
+)
+ITS90_TPW = 273.16  # Triple point of water in K
+
+
+def _polynomial(x, coefficients):
+    # Horner's method, updating a single array in place
+    result = np.full_like(x, coefficients[-1])
+    for coefficient in coefficients[-2::-1]:
+        result *= x
+        result += coefficient
+    return result
+
+
+def steinhart_hart(resistance, coefficients, r_ref=1.0):
+    """
+    Returns the temperature in K. The logarithm is only calculated once.
+    """
+    return 1 / _polynomial(np.log(resistance / r_ref), coefficients)
+
+
+def beta_model(resistance, beta, r_ref, t_ref=25 + ZERO_CELSIUS):
+    """
+    Returns the temperature in K of a thermistor with the resistance r_ref at t_ref.
+    """
+    return 1 / (1 / t_ref + np.log(resistance / r_ref) / beta)
+
+
+def callendar_van_dusen(resistance, r0, a=CVD_A, b=CVD_B, c=CVD_C, iterations=4):
+    """
+    Returns the temperature in K of a platinum RTD. Above 0 °C the quadratic equation is solved directly. Below, the
+    solution of the quadratic equation is refined by Newton's method.
+    """
+    ratio = np.atleast_1d(np.asarray(resistance, dtype=np.float64) / r0)
+    celsius = (-a + np.sqrt(a**2 - 4 * b * (1 - ratio))) / (2 * b)
+    below_zero = ratio < 1
+    if c != 0 and below_zero.any():
+        t, w = celsius[below_zero], ratio[below_zero]
+        for _ in range(iterations):
+            residual = 1 + a * t + b * t**2 + c * (t - 100) * t**3 - w
+            t -= residual / (a + 2 * b * t + c * (4 * t**3 - 300 * t**2))
+        celsius[below_zero] = t
+    return (celsius + ZERO_CELSIUS).reshape(np.shape(resistance))
+
+
+def its90_reference_ratio(temperature):
+    """
+    Returns the reference resistance ratio W_r(T90) of the ITS-90 for temperatures in K from 13.8033 K to 961.78 °C.
+    """
+    temperature = np.asarray(temperature, dtype=np.float64)
+    return np.where(
+        temperature >= ITS90_TPW,
+        _polynomial((temperature - 754.15) / 481, ITS90_C),
+        np.exp(_polynomial((np.log(np.minimum(temperature, ITS90_TPW) / ITS90_TPW) + 1.5) / 1.5, ITS90_A)),
+    )
+
+
+def its90_reference_temperature(ratio):
+    """
+    Returns the temperature T90 in K of the reference resistance ratio W_r. This is the inverse function of the ITS-90,
+    which is accurate to 0.1 mK.
+    """
+    ratio = np.asarray(ratio, dtype=np.float64)
+    return np.where(
+        ratio >= 1,
+        ZERO_CELSIUS + _polynomial((ratio - 2.64) / 1.64, ITS90_D),
+        ITS90_TPW * _polynomial((np.minimum(ratio, 1) ** (1 / 6) - 0.65) / 0.35, ITS90_B),
+    )
+
+
+def its90(resistance, r_tpw, a7=0.0, b7=0.0, c7=0.0, a4=0.0, b4=0.0):
+    """
+    Returns the temperature T90 in K of an SPRT. The deviation function W - W_r of the calibration is subtracted from
+    the measured resistance ratio W = R / r_tpw before the inverse reference function is applied.
+    """
+    ratio = np.asarray(resistance, dtype=np.float64) / r_tpw
+    x = ratio - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviation = np.where(ratio >= 1, x * (a7 + x * (b7 + x * c7)), x * (a4 + b4 * np.log(ratio)))
+    return its90_reference_temperature(ratio - deviation)
+
+
+MODELS = {
+    "steinhart_hart": steinhart_hart,
+    "beta": beta_model,
+    "callendar_van_dusen": callendar_van_dusen,
+    "its90": its90,
+}
+
+
+def _interpolate(resistance, model, size):
+    # Evaluate the model on a uniform grid, so that the grid index of each value is calculated instead of searched
+    valid = np.isfinite(resistance)
+    if not valid.any():
+        return np.full_like(resistance, np.nan)
+    start, stop = np.min(resistance[valid]), np.max(resistance[valid])
+    step = (stop - start) / (size - 1) or 1.0
+    table = model(start + step * np.arange(size))
+    position = (np.where(valid, resistance, start) - start) / step
+    index = np.minimum(position.astype(np.intp), size - 2)
+    position -= index
+    result = table[index] + position * (table[index + 1] - table[index])
+    result[~valid] = np.nan
+    return result
+
+
+def resistance_to_temperature(resistance, sensor, unit="C", lookup_table=None):
+    """
+    Returns the temperature of a sensor, given by name or as a dict of the model and its coefficients, in °C or K.
+    """
+    settings = dict(SENSORS[sensor] if isinstance(sensor, str) else sensor)
+    function = MODELS[settings.pop("model")]
+    resistance = np.asarray(resistance, dtype=np.float64)
+
+    def model(values):
+        return function(values, **settings)
+
+    if lookup_table and resistance.size > 1:
+        temperature = _interpolate(resistance, model, LOOKUP_TABLE_SIZE if lookup_table is True else lookup_table)
+    else:
+        temperature = model(resistance)
+    return temperature - ZERO_CELSIUS if unit == "C" else temperature
+
+
+def convert_sensors(data, settings):
+    """
+    Adds the temperature columns defined by the "sensors" `settings` to `data`.
+    """
+    for column, sensor_settings in settings.items():
+        resistance = data[sensor_settings["column"]].to_numpy(dtype=np.float64) * sensor_settings.get("scale", 1)
+        resistance += sensor_settings.get("offset", 0)
+        data[column] = resistance_to_temperature(
+            resistance, sensor_settings["sensor"], sensor_settings.get("unit", "C"), sensor_settings.get("lookup_table")
+        )
+    return data
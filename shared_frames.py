@@ -0,0 +1,136 @@
+"""
+Transport of DataFrames from worker processes to the plot driver via shared memory. Pickling large DataFrames back to
+the driver costs about as much time as parsing them. Instead, the workers copy the numeric columns into shared memory
+segments and send only their names. The driver maps the segments and builds the DataFrames on top of them without
+copying.
+The segments stay mapped until release() is called by the driver, after the figure has been saved.
+"""
+import atexit
+import gc
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+MIN_SHARED_SIZE = 1024**2  # Smaller arrays are pickled, because creating a segment has an overhead
+
+_segments = []  # The segments mapped by this process
+_unlinked_segments = []  # Segments, that are still in use after release()
+
+
+class SharedArray:
+    """
+    A placeholder for a numpy array in a shared memory segment.
+    """
+
+    def __init__(self, array):
+        array = np.ascontiguousarray(array)
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        self.name, self.dtype, self.shape = segment.name, array.dtype, array.shape
+        # The driver takes ownership of the segment. It stays alive after the worker has closed it.
+        segment.close()
+
+    def attach(self):
+        segment = shared_memory.SharedMemory(name=self.name)
+        _segments.append(segment)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=segment.buf)
+
+
+class SharedFrame:
+    """
+    A placeholder for a DataFrame. Columns with a numpy dtype or a timezone aware datetime dtype are stored in shared
+    memory, all other columns and the index are pickled.
+    """
+
+    def __init__(self, data):
+        self.columns = data.columns
+        self.values = [_share_column(data.iloc[:, i]) for i in range(data.shape[1])]
+        self.index = _share_column(data.index.to_series()) if not isinstance(data.index, pd.RangeIndex) else data.index
+        self.index_name = data.index.name
+
+    def attach(self):
+        index = self.index
+        if not isinstance(index, pd.Index):
+            index = pd.Index(_attach_column(index), name=self.index_name, copy=False)
+        # Columns may have duplicate names, so the DataFrame is assembled by position
+        data = pd.DataFrame({i: _attach_column(value) for i, value in enumerate(self.values)}, index=index, copy=False)
+        data.columns = self.columns
+        return data
+
+
+def _share_column(series):
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        values = series.array.asi8.view(f"M8[{series.dtype.unit}]")
+        return ("datetime_tz", series.dtype, SharedArray(values)) if values.nbytes >= MIN_SHARED_SIZE else series
+    if isinstance(series.dtype, np.dtype) and series.dtype != object and series.nbytes >= MIN_SHARED_SIZE:
+        return ("numpy", series.dtype, SharedArray(series.to_numpy()))
+    return series
+
+
+def _attach_column(value):
+    if isinstance(value, (pd.Series, pd.Index)):
+        return value.array
+    kind, dtype, shared_array = value
+    values = shared_array.attach()
+    if kind == "datetime_tz":
+        try:
+            return pd.arrays.DatetimeArray._simple_new(values, dtype=dtype)  # pylint: disable=protected-access
+        except AttributeError:
+            return pd.Series(values).dt.tz_localize("UTC").dt.tz_convert(dtype.tz).array  # Copies the data
+    return values
+
+
+def share(result):
+    """
+    Replaces the DataFrames, Series and large numpy arrays in the result of a worker by shared memory placeholders.
+    Tuples, lists and dicts are searched recursively.
+    """
+    if isinstance(result, pd.DataFrame):
+        return SharedFrame(result)
+    if isinstance(result, pd.Series):
+        return ("series", result.name, SharedFrame(result.to_frame()))
+    if isinstance(result, np.ndarray) and result.dtype != object and result.nbytes >= MIN_SHARED_SIZE:
+        return SharedArray(result)
+    if isinstance(result, (tuple, list)):
+        return type(result)(share(item) for item in result)
+    if isinstance(result, dict):
+        return {key: share(value) for key, value in result.items()}
+    return result
+
+
+def receive(result):
+    """
+    Maps the shared memory placeholders in the result of a worker. This is the inverse of share().
+    """
+    if isinstance(result, (SharedFrame, SharedArray)):
+        return result.attach()
+    if isinstance(result, tuple) and len(result) == 3 and result[0] == "series" and isinstance(result[2], SharedFrame):
+        return result[2].attach().iloc[:, 0].rename(result[1])
+    if isinstance(result, (tuple, list)):
+        return type(result)(receive(item) for item in result)
+    if isinstance(result, dict):
+        return {key: receive(value) for key, value in result.items()}
+    return result
+
+
+def release():
+    """
+    Removes all segments mapped by this process. Call this, once the data is no longer needed, i.e. after saving the
+    figure. It is safe to call this while the data is still in use, the memory is returned to the OS as soon as the last
+    DataFrame using it is gone.
+    """
+    gc.collect()  # Drop DataFrames, that are only referenced by reference cycles, like closed figures
+    for segment in _segments:
+        segment.unlink()
+    _unlinked_segments.extend(_segments)
+    _segments.clear()
+    for segment in list(_unlinked_segments):
+        try:
+            segment.close()
+        except BufferError:
+            continue  # The data is still in use. Try again with the next call.
+        _unlinked_segments.remove(segment)
+
+
+atexit.register(release)
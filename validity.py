@@ -0,0 +1,57 @@
+"""
+Handling of invalid readings in the logs. The DMMs write an overflow sentinel instead of a reading, +-9.9E+37 for the
+Keysight/Agilent DMMs and -1E+38 for the HP 3458A. The loggers write "None" for missing readings, which pandas already
+reads as NaN.
+Instead of dropping the rows with invalid readings, which copies the whole DataFrame for each filter, the sentinels are
+replaced by NaN in the affected columns only. NaN is the validity mask of a float column, so the mask travels with the
+data through the cache and the worker processes for free. It is applied lazily by the consumers: the plots drop the
+NaNs of the columns they plot, valid_mask() returns the mask of the columns needed for an ADEV or a fit.
+"""
+import numpy as np
+import pandas as pd
+
+SENTINEL_THRESHOLD = 9.9e37  # Readings with a larger magnitude are overflow sentinels
+
+
+def _float_columns(data):
+    return [column for column in data if column != "date" and pd.api.types.is_float_dtype(data[column])]
+
+
+def mask_invalid(data, columns=None, threshold=SENTINEL_THRESHOLD):
+    """
+    Replaces the overflow sentinels of the float `columns`, all by default, by NaN. Only the affected columns are
+    copied, the rows are kept.
+    """
+    for column in _float_columns(data) if columns is None else columns:
+        if column not in data:
+            continue
+        values = data[column].to_numpy()
+        # Checking the extremes does not allocate a temporary, which makes the usual case of no sentinels fast
+        if len(values) == 0 or (np.fmax.reduce(values) < threshold and np.fmin.reduce(values) > -threshold):
+            continue
+        is_invalid = np.abs(values) >= threshold
+        if is_invalid.any():
+            print(f"    Masked {is_invalid.sum()} invalid readings of '{column}'.")
+            data[column] = pd.Series(np.where(is_invalid, np.nan, values), index=data.index, copy=False)
+    return data
+
+
+def valid_mask(data, columns):
+    """
+    Returns a boolean array, that is True for the rows, where all `columns` hold a valid reading.
+    """
+    is_valid = np.ones(len(data), dtype=bool)
+    for column in columns:
+        values = data[column].to_numpy()
+        if values.dtype.kind == "f":
+            is_valid &= np.abs(values) < SENTINEL_THRESHOLD  # This is also False for NaN
+    return is_valid
+
+
+def valid_values(data, column):
+    """
+    Returns the valid readings of a `column` as an array.
+    """
+    values = data[column].to_numpy()
+    is_valid = valid_mask(data, (column,))
+    return values if is_valid.all() else values[is_valid]
@@ -0,0 +1,99 @@
+"""
+A worker pool used to load the files of a figure in parallel. Parsing holds the GIL, so processes are used by default.
+The plot configs contain lambdas, which cannot be pickled, therefore the worker processes are forked and inherit the
+task instead of receiving it from the parent. Only the results are sent back, DataFrames and arrays via shared memory.
+The pools are not nested: the outer pool already uses all CPUs, so a pool started by a worker, e.g. for the blocks of a
+large csv file or the files of concat_series, processes its items sequentially.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+
+import shared_frames
+
+POOL_TYPES = ("process", "thread")
+
+_tasks = {}  # The functions and their arguments, inherited by the forked worker processes
+_task_ids = itertools.count()
+_worker_state = threading.local()
+
+
+def is_worker():
+    """
+    Returns True if called by a worker of map_ordered().
+    """
+    return getattr(_worker_state, "is_worker", False)
+
+
+def _run_in_thread(function, item):
+    _worker_state.is_worker = True
+    try:
+        return function(item)
+    finally:
+        _worker_state.is_worker = False
+
+
+def _run_task(task_id, index):
+    _worker_state.is_worker = True  # The forked process only runs tasks from now on
+    function, items = _tasks[task_id]
+    result = function(items[index])
+    try:
+        return shared_frames.share(result)
+    except OSError as exc:
+        print(f"  Cannot use shared memory, sending the result via pipe: {exc}")
+        return result
+
+
+def _fork_context():
+    try:
+        return multiprocessing.get_context("fork")
+    except ValueError:
+        return None  # Windows does not support fork
+
+
+def map_ordered(function, items, jobs=None, pool="process", group_by=None):
+    """
+    Returns [function(item) for item in items] computed by up to `jobs` workers. The results are in the order of the
+    items. If `jobs` is None, one worker per CPU is used, if it is 1, the items are processed sequentially.
+    The items with the same `group_by(item)` are processed sequentially by the same worker, e.g. the plot entries of the
+    same file, which then share the frame_memo of the worker.
+    """
+    items = list(items)
+    if group_by is not None:
+        groups = {}
+        for index, item in enumerate(items):
+            groups.setdefault(group_by(item), []).append(index)
+        group_results = map_ordered(
+            lambda indices: [function(items[index]) for index in indices], list(groups.values()), jobs=jobs, pool=pool
+        )
+        results = [None] * len(items)
+        for indices, group_result in zip(groups.values(), group_results):
+            for index, result in zip(indices, group_result):
+                results[index] = result
+        return results
+
+    jobs = 1 if is_worker() else min(jobs or os.cpu_count() or 1, len(items))
+    if jobs <= 1:
+        return [function(item) for item in items]
+
+    context = _fork_context() if pool == "process" else None
+    if context is None:
+        if pool == "process":
+            print("  Process pool not supported on this platform. Using threads.")
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(_run_in_thread, itertools.repeat(function), items))
+
+    # Several pools may be started at the same time from different threads, e.g. when the files are loaded by threads
+    task_id = next(_task_ids)
+    _tasks[task_id] = (function, items)
+    # The workers must share the resource tracker of the parent, which takes ownership of their shared memory
+    resource_tracker.ensure_running()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+            results = executor.map(_run_task, itertools.repeat(task_id), range(len(items)))
+            return [shared_frames.receive(result) for result in results]
+    finally:
+        del _tasks[task_id]
@@ -1,7 +1,7 @@
-import pandas as pd
-
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 # cmap = sns.color_palette("ch:s=-.25,rot=-.25_r", as_cmap=True)
 cmap = sns.color_palette("ch:s=.25,rot=-.25", as_cmap=True)  # TODO: revert colourmap, see above
@@ -101,7 +101,7 @@ plot = {
                 },
                 "scaling": {
                     "air_pressure": lambda x: x["air_pressure"] / 100,
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "date": lambda data: parse_dates(data.date),
                 },
             },
         },
@@ -1,7 +1,7 @@
-import pandas as pd
-
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 # cmap = sns.color_palette("ch:s=-.25,rot=-.25_r", as_cmap=True)
 cmap = sns.color_palette("ch:s=.25,rot=-.25", as_cmap=True)  # TODO: revert colourmap, see above
@@ -107,7 +107,7 @@ plot = {
                 "scaling": {
                     "value": lambda x: (x["value"] - x["value"][x.date >= "2021-03-15 6:00:00"].min())
                     / 100,  # in A and relative coordinates
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "date": lambda data: parse_dates(data.date),
                 },
             },
         },
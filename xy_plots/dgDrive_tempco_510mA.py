@@ -1,7 +1,7 @@
-import pandas as pd
-
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 # cmap = sns.color_palette("ch:s=-.25,rot=-.25_r", as_cmap=True)
 cmap = sns.color_palette("ch:s=.25,rot=-.25", as_cmap=True)  # TODO: revert colourmap, see above
@@ -103,7 +103,7 @@ plot = {
                     9: "temperature",
                 },
                 "scaling": {
-                    "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                    "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                     "value": lambda x: (x["value"] - x["value"][x.date >= "2021-03-27 01:00:00"].min())
                     / 10,  # in A and relative coordinates
                 },
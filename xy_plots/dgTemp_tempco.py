@@ -1,7 +1,7 @@
-import pandas as pd
-
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 # cmap = sns.color_palette("ch:s=-.25,rot=-.25_r", as_cmap=True)
 cmap = sns.color_palette("ch:s=.25,rot=-.25", as_cmap=True)  # TODO: revert colourmap, see above
@@ -113,7 +113,7 @@ plot = {
                     / (50 * 10**-6)
                     - 25e-3,
                     # "value": lambda x : x["value"] / (2**31-1) * 4.096,# / (50*10**-6) - 25e-3,
-                    "date": lambda data: pd.to_datetime(data.date, utc=True, format="ISO8601"),
+                    "date": lambda data: parse_dates(data.date, date_format="ISO8601"),
                 },
             },
         },
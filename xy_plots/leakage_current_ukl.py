@@ -1,7 +1,7 @@
-import pandas as pd
-
 import seaborn as sns
 
+from date_parser import parse_dates
+
 colors = sns.color_palette("colorblind")
 # cmap = sns.color_palette("ch:s=-.25,rot=-.25_r", as_cmap=True)
 cmap = sns.color_palette("ch:s=.25,rot=-.25", as_cmap=True)  # TODO: revert colourmap, see above
@@ -103,7 +103,7 @@ plot = {
                 },
                 "scaling": {
                     "value": lambda x: x.value / 2.192e6,  # divide voltage by 2.192e6
-                    "date": lambda data: pd.to_datetime(data.date, utc=True),
+                    "date": lambda data: parse_dates(data.date),
                 },
             },
         },